@@ -31,6 +31,7 @@ from .contract import (
     Warrant,
 )
 from .flexreport import FlexError, FlexReport
+from .governor import CollectionUsage, MemoryGovernor
 from .ib import IB, StartupFetch, StartupFetchALL, StartupFetchNONE
 from .ibcontroller import IBC, Watchdog
 from .objects import (
@@ -39,6 +40,7 @@ from .objects import (
     BarDataList,
     CommissionReport,
     ConnectionStats,
+    DecoderStats,
     DepthMktDataDescription,
     Dividends,
     DOMLevel,
@@ -73,6 +75,7 @@ from .objects import (
     ScannerSubscription,
     SmartComponent,
     SoftDollarTier,
+    ThrottleStats,
     TickAttrib,
     TickAttribBidAsk,
     TickAttribLast,
@@ -103,7 +106,10 @@ from .order import (
     Trade,
     VolumeCondition,
 )
-from .ticker import Ticker
+from .pool import IBPool
+from .recorder import Recorder, Replayer
+from .ticker import BookSide, Ticker, TickHistory
+from .tickertable import TickerTable
 from .version import __version__, __version_info__
 from .wrapper import RequestError, Wrapper
 
@@ -135,6 +141,11 @@ __all__ = [
     "FlexError",
     "FlexReport",
     "IB",
+    "IBPool",
+    "Recorder",
+    "Replayer",
+    "MemoryGovernor",
+    "CollectionUsage",
     "IBDefaults",
     "OrderStateNumeric",
     "IBC",
@@ -144,6 +155,7 @@ __all__ = [
     "BarDataList",
     "CommissionReport",
     "ConnectionStats",
+    "DecoderStats",
     "DOMLevel",
     "DepthMktDataDescription",
     "Dividends",
@@ -177,6 +189,7 @@ __all__ = [
     "ScannerSubscription",
     "SmartComponent",
     "SoftDollarTier",
+    "ThrottleStats",
     "TickAttrib",
     "TickAttribBidAsk",
     "TickAttribLast",
@@ -204,6 +217,9 @@ __all__ = [
     "Trade",
     "VolumeCondition",
     "Ticker",
+    "TickHistory",
+    "BookSide",
+    "TickerTable",
     "__version__",
     "__version_info__",
     "RequestError",
@@ -1,21 +1,23 @@
 """Socket client for communicating with Interactive Brokers."""
 
 import asyncio
-import io
 import logging
 import math
 import struct
 import time
 from collections import deque
-from typing import Any, Callable, Deque, List, Optional
+from typing import Deque, List, Optional
 
 from eventkit import Event
 
 from .connection import Connection
-from .contract import Contract
 from .decoder import Decoder
-from .objects import ConnectionStats, WshEventData
-from .util import dataclassAsTuple, getLoop, run, UNSET_DOUBLE, UNSET_INTEGER
+from .encoder import Encoder
+from .objects import ConnectionStats, ThrottleStats, WshEventData
+from .util import dataclassAsTuple, getLoop, run, UNSET_DOUBLE
+
+_packLength = struct.Struct(">I").pack
+_unpackLength = struct.Struct(">I").unpack_from
 
 
 class Client:
@@ -66,6 +68,17 @@ class Client:
         ``RequestsInterval`` seconds. Set to 0 to disable throttling.
       RequestsInterval (float):
         Time interval (in seconds) for request throttling.
+        Throttled requests are queued in separate lanes, in order of
+        priority: order entry and cancels (``ORDERS``),
+        account, position and execution requests (``ACCOUNT``) and
+        everything else such as market and historical data (``DATA``).
+      CoalesceWrites (bool):
+        Gather all requests that are sent during one iteration of the
+        event loop and write them to the socket with a single call.
+      DecodeBatch (bool):
+        Once the API is ready, decode each network packet in one go
+        and hand all its messages to the decoder as a single batch,
+        instead of decoding and dispatching message by message.
       MinClientVersion (int):
         Client protocol version.
       MaxClientVersion (int):
@@ -83,15 +96,20 @@ class Client:
 
     MaxRequests = 45
     RequestsInterval = 1
+    CoalesceWrites = False
+    DecodeBatch = False
 
     MinClientVersion = 157
     MaxClientVersion = 178
 
     DISCONNECTED, CONNECTING, CONNECTED = range(3)
 
+    ORDERS, ACCOUNT, DATA = range(3)
+
     def __init__(self, wrapper):
         self.wrapper = wrapper
         self.decoder = Decoder(wrapper, 0)
+        self.encoder = Encoder()
         self.apiStart = Event("apiStart")
         self.apiEnd = Event("apiEnd")
         self.apiError = Event("apiError")
@@ -119,7 +137,6 @@ class Client:
         self.connState = Client.DISCONNECTED
         self._apiReady = False
         self._serverVersion = 0
-        self._data = b""
         self._hasReqId = False
         self._reqIdSeq = 0
         self._accounts = []
@@ -127,7 +144,7 @@ class Client:
         self._numBytesRecv = 0
         self._numMsgRecv = 0
         self._isThrottling = False
-        self._msgQ: Deque[str] = deque()
+        self._msgQs: tuple[deque[bytes], ...] = (deque(), deque(), deque())
         self._timeQ: Deque[float] = deque()
 
     def serverVersion(self) -> int:
@@ -214,6 +231,7 @@ class Client:
             self.clientId = int(clientId)
             self.connState = Client.CONNECTING
             timeout = timeout or None
+            self.conn.coalesce = self.CoalesceWrites
             await asyncio.wait_for(self.conn.connectAsync(host, port), timeout)
             self._logger.info("Connected")
             msg = b"API\0" + self._prefix(
@@ -229,9 +247,9 @@ class Client:
             self._logger.info("API connection ready")
         except BaseException as e:
             self.disconnect()
-            msg = f"API connection failed: {e!r}"
-            self._logger.error(msg)
-            self.apiError.emit(msg)
+            errorMsg = f"API connection failed: {e!r}"
+            self._logger.error(errorMsg)
+            self.apiError.emit(errorMsg)
             if isinstance(e, ConnectionRefusedError):
                 self._logger.error("Make sure API port on TWS/IBG is open")
             raise
@@ -251,95 +269,40 @@ class Client:
         if not self.isConnected():
             raise ConnectionError("Not connected")
 
-        # fmt: off
-        FORMAT_HANDLERS: dict[Any, Callable[[Any], str]] = {
-            # Contracts are formatted in IBKR null delimiter format
-            Contract: lambda c: "\0".join([
-                str(f)
-                for f in (
-                    c.conId,
-                    c.symbol,
-                    c.secType,
-                    c.lastTradeDateOrContractMonth,
-                    c.strike,
-                    c.right,
-                    c.multiplier,
-                    c.exchange,
-                    c.primaryExchange,
-                    c.currency,
-                    c.localSymbol,
-                    c.tradingClass,
-                )
-            ]),
-
-            # Float conversion has 3 stages:
-            #  - Convert 'IBKR unset' double to empty (if requested)
-            #  - Convert infinity to 'Infinite' string (if appropriate)
-            #  - else, convert float to string normally
-            float: lambda f: ""
-            if (makeEmpty and f == UNSET_DOUBLE)
-            else ("Infinite" if (f == math.inf) else str(f)),
-
-            # Int conversion has 2 stages:
-            #  - Convert 'IBKR unset' to empty (if requested)
-            #  - else, convert int to string normally
-            int: lambda f: "" if makeEmpty and f == UNSET_INTEGER else str(f),
-
-            # None is always just an empty string.
-            # (due to a quirk of Python, 'type(None)' is how you properly generate the NoneType value)
-            type(None): lambda _: "",
-
-            # Strings are always strings
-            str: lambda s: s,
-
-            # Bools become strings "1" or "0"
-            bool: lambda b: "1" if b else "0",
-
-            # Lists of tags become semicolon-appended KV pairs
-            list: lambda lst: "".join([f"{v.tag}={v.value};" for v in lst]),
-        }
-        # fmt: on
-
-        # start of new message
-        msg = io.StringIO()
-
-        for field in fields:
-            # Fetch type converter for this field (falls back to 'str(field)' as a default for unmatched types)
-            # (extra `isinstance()` wrapper needed here because Contract subclasses are their own type, but we want
-            #  to only match against the Contract parent class for formatting operations)
-            convert = FORMAT_HANDLERS.get(
-                Contract if isinstance(field, Contract) else type(field), str
-            )
-
-            # Convert field to IBKR protocol string part
-            s = convert(field)
+        self.sendMsg(self.encoder.encode(fields, makeEmpty))
 
-            # Append converted IBKR protocol string to message buffer
-            msg.write(s)
-            msg.write("\0")
-
-        generated = msg.getvalue()
-        self.sendMsg(generated)
+    def sendMsg(self, msg: bytes | str):
+        """
+        Send a message, or queue it when throttling.
 
-    def sendMsg(self, msg: str):
+        The message is either an encoded length-prefixed message or
+        a null-terminated string of fields. While throttling, queued
+        messages are sent in order of their lane: order entry first,
+        then account requests and then market data requests.
+        """
         loop = getLoop()
         t = loop.time()
         times = self._timeQ
-        msgs = self._msgQ
+        lanes = self._msgQs
         while times and t - times[0] > self.RequestsInterval:
             times.popleft()
 
         if msg:
-            msgs.append(msg)
-
-        while msgs and (len(times) < self.MaxRequests or not self.MaxRequests):
-            msg = msgs.popleft()
-            self.conn.sendMsg(self._prefix(msg.encode()))
-            times.append(t)
-            if self._logger.isEnabledFor(logging.DEBUG):
-                self._logger.debug(">>> %s", msg[:-1].replace("\0", ","))
-
-        if msgs:
+            data: bytes = self._prefix(msg.encode()) if isinstance(msg, str) else msg
+            lanes[self._lane(data)].append(data)
+
+        for msgs in lanes:
+            while msgs and (len(times) < self.MaxRequests or not self.MaxRequests):
+                data = msgs.popleft()
+                self.conn.sendMsg(data)
+                times.append(t)
+                if self._logger.isEnabledFor(logging.DEBUG):
+                    self._logger.debug(
+                        ">>> %s",
+                        data[4:-1].decode(errors="backslashreplace").replace("\0", ","),
+                    )
+
+        if any(lanes):
             if not self._isThrottling:
                 self._isThrottling = True
                 self.throttleStart.emit()
@@ -351,30 +314,52 @@ class Client:
                 self.throttleEnd.emit()
                 self._logger.debug("Stopped to throttle requests")
 
-    def _prefix(self, msg):
+    def throttleStats(self) -> ThrottleStats:
+        """Get the state of the request throttler."""
+        orders, account, data = self._msgQs
+        return ThrottleStats(
+            self._isThrottling,
+            len(self._timeQ),
+            len(orders),
+            len(account),
+            len(data),
+        )
+
+    def _lane(self, msg: bytes) -> int:
+        # the message id is the first field after the 4 byte length prefix
+        msgId = int(msg[4 : msg.index(b"\0", 4)])
+        return _requestLanes.get(msgId, Client.DATA)
+
+    def _prefix(self, msg: bytes) -> bytes:
         # prefix a message with its length
-        return struct.pack(">I", len(msg)) + msg
+        return _packLength(len(msg)) + msg
 
     def _onSocketHasData(self, data):
         debug = self._logger.isEnabledFor(logging.DEBUG)
         if self._tcpDataArrived:
             self._tcpDataArrived()
 
-        self._data += data
         self._numBytesRecv += len(data)
 
-        while True:
-            if len(self._data) <= 4:
-                break
-
+        if self.DecodeBatch and self._apiReady:
+            batch = self._splitBatch(data)
+            self._numMsgRecv += len(batch)
+            if debug:
+                for fields in batch:
+                    self._logger.debug("<<< %s", ",".join(fields))
+            self.decoder.interpretBatch(batch)
+            if self._tcpDataProcessed:
+                self._tcpDataProcessed()
+            return
+
+        # the connection only hands out complete messages
+        pos = 0
+        end = len(data)
+        while pos < end:
             # 4 byte prefix tells the message length
-            msgEnd = 4 + struct.unpack(">I", self._data[:4])[0]
-            if len(self._data) < msgEnd:
-                # insufficient data for now
-                break
-
-            msg = self._data[4:msgEnd].decode(errors="backslashreplace")
-            self._data = self._data[msgEnd:]
+            msgEnd = pos + 4 + _unpackLength(data, pos)[0]
+            msg = str(data[pos + 4 : msgEnd], "utf-8", "backslashreplace")
+            pos = msgEnd
             fields = msg.split("\0")
             fields.pop()  # pop off last empty element
             self._numMsgRecv += 1
@@ -416,6 +401,29 @@ class Client:
         if self._tcpDataProcessed:
             self._tcpDataProcessed()
 
+    def _splitBatch(self, data) -> list[list[str]]:
+        """
+        Split a packet of complete messages into lists of fields.
+
+        The whole packet is decoded in one go as latin-1, so that
+        character offsets line up with byte offsets. Messages that turn
+        out to contain non-ASCII characters are decoded again as UTF-8.
+        """
+        text = str(data, "latin-1")
+        batch = []
+        pos = 0
+        end = len(text)
+        while pos < end:
+            # 4 byte prefix tells the message length
+            msgEnd = pos + 4 + _unpackLength(data, pos)[0]
+            # leave out the terminating null byte of the last field
+            msg = text[pos + 4 : msgEnd - 1]
+            if not msg.isascii():
+                msg = str(data[pos + 4 : msgEnd - 1], "utf-8", "backslashreplace")
+            batch.append(msg.split("\0"))
+            pos = msgEnd
+        return batch
+
     def _onSocketDisconnected(self, msg):
         wasReady = self.isReady()
         if not self.isConnected():
@@ -1182,3 +1190,16 @@ class Client:
 
     def reqUserInfo(self, reqId):
         self.send(104, reqId)
+
+
+# throttling lane of the outgoing message ids, anything else is data
+_requestLanes = {
+    # placeOrder, cancelOrder, exerciseOptions, reqGlobalCancel, startApi
+    **dict.fromkeys((3, 4, 21, 58, 71), Client.ORDERS),
+    # open orders, account updates, executions, ids, managed accounts,
+    # positions, account summary, PnL and completed orders
+    **dict.fromkeys(
+        (5, 6, 7, 8, 15, 16, 17, 61, 62, 63, 64, 74, 75, 76, 77, 92, 93, 94, 95, 99),
+        Client.ACCOUNT,
+    ),
+}
@@ -1,33 +1,59 @@
 """Event-driven socket connection."""
 
 import asyncio
+import struct
 
 from eventkit import Event
 
 from ib_async.util import getLoop
 
+_unpackLength = struct.Struct(">I").unpack_from
 
-class Connection(asyncio.Protocol):
+
+class Connection(asyncio.BufferedProtocol):
     """
     Event-driven socket connection.
 
+    Incoming data is read directly into a growable receive buffer.
+    Only complete length-prefixed messages are handed out; a partially
+    received message stays in place in the buffer until the rest of it
+    has arrived.
+
+    With ``coalesce`` set, messages that are sent during one iteration of
+    the event loop are gathered and written to the socket in one go
+    at the start of the next iteration.
+
+    With a ``recorder`` set, such as a :class:`.Recorder`, all incoming
+    data is passed to its ``record`` method as it arrives, and every
+    outgoing message as it is sent.
+
     Events:
-        * ``hasData`` (data: bytes):
-          Emits the received socket data.
+        * ``hasData`` (data: memoryview):
+          Emits a view on one or more complete, length-prefixed messages.
+          The view is only valid for the duration of the event.
         * ``disconnected`` (msg: str):
           Is emitted on socket disconnect, with an error message in case
           of error, or an empty string in case of a normal disconnect.
     """
 
+    InitialBufferSize = 64 * 1024
+    MinReadSize = 16 * 1024
+
     def __init__(self):
         self.hasData = Event("hasData")
         self.disconnected = Event("disconnected")
+        self.coalesce = False
+        self.recorder = None
         self.reset()
 
     def reset(self):
         self.transport = None
         self.numBytesSent = 0
         self.numMsgSent = 0
+        self._pending = []
+        self._buf = bytearray(self.InitialBufferSize)
+        self._start = 0
+        self._end = 0
 
     async def connectAsync(self, host, port):
         if self.transport:
@@ -40,6 +66,7 @@ class Connection(asyncio.Protocol):
 
     def disconnect(self):
         if self.transport:
+            self.flush()
             self.transport.write_eof()
             try:
                 # sometimes the loop is already closed, but we don't
@@ -56,14 +83,103 @@ class Connection(asyncio.Protocol):
 
     def sendMsg(self, msg):
         if self.transport:
-            self.transport.write(msg)
-            self.numBytesSent += len(msg)
-            self.numMsgSent += 1
+            if self.recorder:
+                self.recorder.record(msg, outgoing=True)
+            if self.coalesce:
+                if not self._pending:
+                    getLoop().call_soon(self.flush)
+                self._pending.append(msg)
+            else:
+                self.transport.write(msg)
+                self.numBytesSent += len(msg)
+                self.numMsgSent += 1
+
+    def flush(self):
+        """Write out the messages that are gathered for coalescing."""
+        pending = self._pending
+        if pending:
+            self._pending = []
+            if self.transport:
+                self.transport.writelines(pending)
+                self.numBytesSent += sum(len(msg) for msg in pending)
+                self.numMsgSent += len(pending)
 
     def connection_lost(self, exc):
         self.transport = None
+        if self.recorder:
+            self.recorder.flush()
         msg = str(exc) if exc else ""
         self.disconnected.emit(msg)
 
-    def data_received(self, data):
-        self.hasData.emit(data)
+    def get_buffer(self, sizehint):
+        start = self._start
+        end = self._end
+        if start == end:
+            # everything has been consumed, rewind for free
+            start = end = self._start = self._end = 0
+            if len(self._buf) > self.InitialBufferSize:
+                # give back the memory of a large reply
+                self._buf = bytearray(self.InitialBufferSize)
+
+        buf = self._buf
+        needed = max(sizehint, self.MinReadSize)
+        pending = end - start
+        if pending >= 4:
+            # make room for the remainder of the partially received message
+            msgLen = 4 + _unpackLength(buf, start)[0]
+            needed = max(needed, msgLen - pending)
+
+        if len(buf) - end < needed:
+            size = len(buf)
+            while size - pending < needed:
+                size *= 2
+            if size > len(buf):
+                # grow into a new buffer, since the old one may still be
+                # exported by a memoryview that is held by the transport
+                newBuf = bytearray(size)
+                newBuf[:pending] = buf[start:end]
+                self._buf = buf = newBuf
+            else:
+                # move the partial message to the front of the buffer
+                buf[:pending] = buf[start:end]
+            self._start = 0
+            self._end = pending
+
+        return memoryview(buf)[self._end :]
+
+    def buffer_updated(self, nbytes):
+        buf = self._buf
+        start = pos = self._start
+        end = self._end = self._end + nbytes
+        if self.recorder:
+            self.recorder.record(buf[end - nbytes : end])
+
+        # walk over the complete messages using the 4 byte length prefixes
+        while end - pos >= 4:
+            msgEnd = pos + 4 + _unpackLength(buf, pos)[0]
+            if msgEnd > end:
+                # insufficient data for now
+                break
+            pos = msgEnd
+
+        if pos > start:
+            self._start = pos
+            with memoryview(buf) as view:
+                data = view[start:pos]
+                try:
+                    self.hasData.emit(data)
+                finally:
+                    data.release()
+
+    def feed(self, data):
+        """
+        Feed the given bytes into the connection as if they were
+        received from the socket.
+        """
+        data = memoryview(data)
+        while data:
+            with self.get_buffer(len(data)) as buf:
+                n = min(len(buf), len(data))
+                buf[:n] = data[:n]
+            data = data[n:]
+            self.buffer_updated(n)
@@ -2,6 +2,7 @@
 
 import dataclasses
 import logging
+import time
 from datetime import datetime
 from typing import Any, cast
 
@@ -15,6 +16,7 @@ from .contract import (
 from .objects import (
     BarData,
     CommissionReport,
+    DecoderStats,
     DepthMktDataDescription,
     Execution,
     FamilyCode,
@@ -32,20 +34,86 @@ from .objects import (
     TickAttribLast,
 )
 from .order import Order, OrderComboLeg, OrderCondition, OrderState
-from .util import parseIBDatetime, UNSET_DOUBLE, ZoneInfo
+from .util import (
+    barArray,
+    dataclassPlan,
+    parseIBDatetime,
+    tickArray,
+    UNSET_DOUBLE,
+    ZoneInfo,
+)
 from .wrapper import Wrapper
 
 
+class Interned(str):
+    """
+    Field type for :meth:`Decoder.wrap` of a low-cardinality string field
+    that is to be interned.
+    """
+
+
+class Recurring(int):
+    """
+    Field type for :meth:`Decoder.wrap` of an integer field with few
+    distinct values, such as a request id or tick type, that is converted
+    by lookup in a table of earlier conversions.
+    """
+
+
+class _IntTable(dict):
+    """
+    Table of integer fields and their conversion, that is filled in on
+    a miss and cleared when it grows to ``maxSize`` entries.
+    """
+
+    maxSize = 20000
+
+    def __missing__(self, s: str) -> int:
+        if len(self) >= self.maxSize:
+            self.clear()
+        i = self[s] = int(s or 0)
+        return i
+
+
+# source code to convert a message field to the given type
+_fieldConverters = {
+    str: "{}",
+    Interned: "intern({})",
+    Recurring: "ints[{}]",
+    int: "int({} or 0)",
+    float: "float({} or 0)",
+    bool: "bool(int({} or 0))",
+}
+
+
 class Decoder:
-    """Decode IB messages and invoke corresponding wrapper methods."""
+    """
+    Decode IB messages and invoke corresponding wrapper methods.
+
+    Decoding statistics per message type can be collected by
+    enabling them with :meth:`enableStats`. When disabled they
+    add no overhead at all.
+
+    The market data messages (tick price, size, generic, string and
+    tick-by-tick) are looked up in :attr:`tickHandlers` by their raw
+    message id field first, skipping the integer conversion. A handler
+    that is replaced in :attr:`handlers` for one of these messages has
+    to be replaced in :attr:`tickHandlers` as well. Their request id and
+    tick type fields are converted by table lookup instead of ``int()``.
+    """
 
     def __init__(self, wrapper: Wrapper, serverVersion: int):
         self.wrapper = wrapper
         self.serverVersion = serverVersion
         self.logger = logging.getLogger("ib_async.Decoder")
+        # msgId string -> [count, total time in ns, histogram]
+        self._stats: dict[str, list] = {}
+        self.internMaxSize = 20000
+        self._interned: dict[str, str] = {}
+        self._ints = _IntTable()
         self.handlers = {
             1: self.priceSizeTick,
-            2: self.wrap("tickSize", [int, int, float]),
+            2: self.wrap("tickSize", [Recurring, Recurring, float]),
             3: self.wrap(
                 "orderStatus",
                 [int, str, float, float, float, int, int, float, int, str, float],
@@ -53,7 +121,7 @@ class Decoder:
             ),
             4: self.errorMsg,
             5: self.openOrder,
-            6: self.wrap("updateAccountValue", [str, str, str, str]),
+            6: self.wrap("updateAccountValue", [Interned, str, Interned, Interned]),
             7: self.updatePortfolio,
             8: self.wrap("updateAccountTime", [str]),
             9: self.wrap("nextValidId", [int]),
@@ -61,7 +129,8 @@ class Decoder:
             11: self.execDetails,
             12: self.wrap("updateMktDepth", [int, int, int, int, float, float]),
             13: self.wrap(
-                "updateMktDepthL2", [int, int, str, int, int, float, float, bool]
+                "updateMktDepthL2",
+                [int, int, Interned, int, int, float, float, bool],
             ),
             14: self.wrap("updateNewsBulletin", [int, int, str, str]),
             15: self.wrap("managedAccounts", [str]),
@@ -71,8 +140,8 @@ class Decoder:
             19: self.wrap("scannerParameters", [str]),
             20: self.scannerData,
             21: self.tickOptionComputation,
-            45: self.wrap("tickGeneric", [int, int, float]),
-            46: self.wrap("tickString", [int, int, str]),
+            45: self.wrap("tickGeneric", [Recurring, Recurring, float]),
+            46: self.tickString,
             47: self.wrap(
                 "tickEFP", [int, int, float, str, float, int, str, float, float]
             ),
@@ -91,7 +160,7 @@ class Decoder:
             59: self.commissionReport,
             61: self.position,
             62: self.wrap("positionEnd", []),
-            63: self.wrap("accountSummary", [int, str, str, str, str]),
+            63: self.wrap("accountSummary", [int, Interned, Interned, str, Interned]),
             64: self.wrap("accountSummaryEnd", [int]),
             65: self.wrap("verifyMessageAPI", [str]),
             66: self.wrap("verifyCompleted", [bool, str]),
@@ -101,7 +170,10 @@ class Decoder:
             70: self.wrap("verifyAndAuthCompleted", [bool, str]),
             71: self.positionMulti,
             72: self.wrap("positionMultiEnd", [int]),
-            73: self.wrap("accountUpdateMulti", [int, str, str, str, str, str]),
+            73: self.wrap(
+                "accountUpdateMulti",
+                [int, Interned, Interned, Interned, str, Interned],
+            ),
             74: self.wrap("accountUpdateMultiEnd", [int]),
             75: self.securityDefinitionOptionParameter,
             76: self.wrap("securityDefinitionOptionParameterEnd", [int], skip=1),
@@ -109,7 +181,7 @@ class Decoder:
             78: self.familyCodes,
             79: self.symbolSamples,
             80: self.mktDepthExchanges,
-            81: self.wrap("tickReqParams", [int, float, str, int], skip=1),
+            81: self.wrap("tickReqParams", [int, float, Interned, int], skip=1),
             82: self.smartComponents,
             83: self.wrap("newsArticle", [int, int, str], skip=1),
             84: self.wrap("tickNews", [int, int, str, str, str, str], skip=1),
@@ -139,70 +211,215 @@ class Decoder:
             106: self.historicalSchedule,
             107: self.wrap("userInfo", [int, str], skip=1),
         }
+        # hot path for market data, keyed by the message id field as is
+        self.tickHandlers = {
+            str(msgId): self.handlers[msgId] for msgId in (1, 2, 45, 46, 99)
+        }
 
     def wrap(self, methodName, types, skip=2):
         """
         Create a message handler that invokes a wrapper method
         with the in-order message fields as parameters, skipping over
         the first ``skip`` fields, and parsed according to the ``types`` list.
-        """
 
-        def handler(fields):
-            method = getattr(self.wrapper, methodName, None)
-            if method:
-                try:
-                    args = [
-                        (
-                            field
-                            if typ is str
+        The wrapper method is looked up once and the handler is compiled
+        with a fixed conversion per field. A message with fewer fields
+        than expected is handled by converting just the fields that
+        are present.
+        """
+        method = getattr(self.wrapper, methodName, None)
+        if not method:
+
+            def handler(fields):
+                pass
+
+            handler.__name__ = methodName
+            return handler
+
+        intern = self.intern
+        ints = self._ints
+
+        def generic(fields):
+            args = fields[skip:]
+            try:
+                args = [
+                    (
+                        field
+                        if typ is str
+                        else (
+                            intern(field)
+                            if typ is Interned
                             else (
                                 int(field or 0)
                                 if typ is int
                                 else (
                                     float(field or 0)
                                     if typ is float
-                                    else bool(int(field or 0))
+                                    else (
+                                        ints[field]
+                                        if typ is Recurring
+                                        else bool(int(field or 0))
+                                    )
                                 )
                             )
                         )
-                        for (typ, field) in zip(types, fields[skip:])
-                    ]
-                    method(*args)
-                except Exception:
-                    self.logger.exception(f"Error for {methodName}({args}):")
-
+                    )
+                    for (typ, field) in zip(types, fields[skip:])
+                ]
+                method(*args)
+            except Exception:
+                self.logger.exception(f"Error for {methodName}({args}):")
+
+        args = ", ".join(
+            _fieldConverters[typ].format(f"fields[{i}]")
+            for i, typ in enumerate(types, skip)
+        )
+        source = (
+            "def handler(fields):\n"
+            f"    if len(fields) < {skip + len(types)}:\n"
+            "        return generic(fields)\n"
+            "    try:\n"
+            f"        method({args})\n"
+            "    except Exception:\n"
+            f"        logger.exception(f'Error for {methodName}({{fields[{skip}:]}}):')\n"
+        )
+        namespace = {
+            "method": method,
+            "generic": generic,
+            "intern": intern,
+            "ints": ints,
+            "logger": self.logger,
+        }
+        # the source is built from the fixed converter table and the
+        # message layout only, no outside input ends up in it
+        code = compile(source, f"<{methodName} handler>", "exec")
+        exec(code, namespace)  # noqa: S102
+        handler = namespace["handler"]
+        handler.__name__ = methodName
         return handler
 
     def interpret(self, fields):
         """Decode fields and invoke corresponding wrapper method."""
         try:
-            msgId = int(fields[0])
-            handler = self.handlers[msgId]
+            handler = self.tickHandlers.get(fields[0])
+            if handler is None:
+                handler = self.handlers[int(fields[0])]
             handler(fields)
         except Exception:
             self.logger.exception(f"Error handling fields: {fields}")
 
+    def interpretBatch(self, batch):
+        """
+        Decode and handle a batch of messages, each given as a list
+        of fields.
+        """
+        tickHandlers = self.tickHandlers
+        handlers = self.handlers
+        for fields in batch:
+            try:
+                handler = tickHandlers.get(fields[0])
+                if handler is None:
+                    handler = handlers[int(fields[0])]
+                handler(fields)
+            except Exception:
+                self.logger.exception(f"Error handling fields: {fields}")
+
+    def enableStats(self, enable: bool = True):
+        """
+        Enable or disable the collection of decoding statistics.
+        Disabling keeps the statistics collected so far.
+        """
+        if enable:
+            self.interpret = self._interpretWithStats  # type: ignore
+            self.interpretBatch = self._interpretBatchWithStats  # type: ignore
+        else:
+            self.__dict__.pop("interpret", None)
+            self.__dict__.pop("interpretBatch", None)
+
+    def statsEnabled(self) -> bool:
+        return "interpret" in self.__dict__
+
+    def resetStats(self):
+        self._stats.clear()
+
+    def stats(self) -> list[DecoderStats]:
+        """
+        Get the decoding statistics per message type, with the
+        total time (in seconds) spent on decoding and handling.
+        """
+        result = []
+        for key, (count, totalTime, histogram) in self._stats.items():
+            try:
+                msgId = int(key)
+                handler = self.handlers[msgId]
+                name = handler.__name__
+            except (ValueError, KeyError):
+                msgId = -1
+                name = ""
+            result.append(
+                DecoderStats(msgId, name, count, totalTime / 1e9, tuple(histogram))
+            )
+        return sorted(result, key=lambda s: s.msgId)
+
+    def _interpretWithStats(self, fields):
+        t0 = time.perf_counter_ns()
+        Decoder.interpret(self, fields)
+        self._record(fields[0], time.perf_counter_ns() - t0)
+
+    def _interpretBatchWithStats(self, batch):
+        interpret = Decoder.interpret
+        clock = time.perf_counter_ns
+        record = self._record
+        for fields in batch:
+            t0 = clock()
+            interpret(self, fields)
+            record(fields[0], clock() - t0)
+
+    def _record(self, key: str, ns: int):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = [0, 0, [0] * 64]
+        stats[0] += 1
+        stats[1] += ns
+        stats[2][min(ns.bit_length(), 63)] += 1
+
+    def intern(self, s: str) -> str:
+        """
+        Get the shared instance of a low-cardinality string field, such as
+        a symbol, exchange or account. The table of interned strings is
+        cleared when it grows to ``internMaxSize`` entries.
+        """
+        table = self._interned
+        r = table.get(s)
+        if r is None:
+            if len(table) >= self.internMaxSize:
+                table.clear()
+            r = table[s] = s
+        return r
+
+    def internContract(self, c: Contract):
+        """Intern the low-cardinality string fields of the contract."""
+        intern = self.intern
+        c.symbol = intern(c.symbol)
+        c.secType = intern(c.secType)
+        c.exchange = intern(c.exchange)
+        c.primaryExchange = intern(c.primaryExchange)
+        c.currency = intern(c.currency)
+        c.tradingClass = intern(c.tradingClass)
+
     def parse(self, obj):
         """Parse the object's properties according to its default types."""
-        for field in dataclasses.fields(obj):
-            typ = type(field.default)
-            if typ is str:
-                continue
-            v = getattr(obj, field.name)
-
-            if typ is int:
-                setattr(obj, field.name, int(v) if v else field.default)
-            elif typ is float:
-                setattr(obj, field.name, float(v) if v else field.default)
-            elif typ is bool:
-                setattr(obj, field.name, bool(int(v)) if v else field.default)
+        for name, default, convert in dataclassPlan(obj).parsers:
+            v = getattr(obj, name)
+            setattr(obj, name, convert(v) if v else default)
 
     def priceSizeTick(self, fields):
         _, _, reqId, tickType, price, size, _ = fields
 
         if price:
+            ints = self._ints
             self.wrapper.priceSizeTick(
-                int(reqId), int(tickType), float(price), float(size or 0)
+                ints[reqId], ints[tickType], float(price), float(size or 0)
             )
 
     def errorMsg(self, fields):
@@ -241,6 +458,7 @@ class Decoder:
         ) = fields
 
         self.parse(c)
+        self.internContract(c)
         self.wrapper.updatePortfolio(
             c,
             float(position),
@@ -249,7 +467,7 @@ class Decoder:
             float(averageCost),
             float(unrealizedPNL),
             float(realizedPNL),
-            accountName,
+            self.intern(accountName),
         )
 
     def contractDetails(self, fields):
@@ -341,8 +559,22 @@ class Decoder:
         cd.longName = cd.longName.encode().decode("unicode-escape")
         self.parse(cd)
         self.parse(c)
+        self.internContract(c)
+        self.internDetails(cd)
+        cd.industry = self.intern(cd.industry)
+        cd.category = self.intern(cd.category)
+        cd.subcategory = self.intern(cd.subcategory)
+        cd.stockType = self.intern(cd.stockType)
         self.wrapper.contractDetails(int(reqId), cd)
 
+    def internDetails(self, cd: ContractDetails):
+        """Intern the low-cardinality string fields of the contract details."""
+        intern = self.intern
+        cd.marketName = intern(cd.marketName)
+        cd.orderTypes = intern(cd.orderTypes)
+        cd.validExchanges = intern(cd.validExchanges)
+        cd.timeZoneId = intern(cd.timeZoneId)
+
     def bondContractDetails(self, fields):
         cd = ContractDetails()
         cd.contract = c = Contract()
@@ -421,6 +653,8 @@ class Decoder:
 
         self.parse(cd)
         self.parse(c)
+        self.internContract(c)
+        self.internDetails(cd)
         self.wrapper.bondContractDetails(int(reqId), cd)
 
     def execDetails(self, fields):
@@ -465,6 +699,10 @@ class Decoder:
 
         self.parse(c)
         self.parse(ex)
+        self.internContract(c)
+        ex.acctNumber = self.intern(ex.acctNumber)
+        ex.exchange = self.intern(ex.exchange)
+        ex.side = self.intern(ex.side)
         time = cast(datetime, parseIBDatetime(timeStr))
         if not time.tzinfo:
             tz = self.wrapper.ib.TimezoneTWS
@@ -476,6 +714,12 @@ class Decoder:
 
     def historicalData(self, fields):
         _, reqId, startDateStr, endDateStr, numBars, *fields = fields
+        if int(reqId) in self.wrapper.columnarReqIds:
+            bars = barArray(fields, int(numBars))
+            self.wrapper.historicalDataColumns(int(reqId), bars)
+            self.wrapper.historicalDataEnd(int(reqId), startDateStr, endDateStr)
+            return
+
         get = iter(fields).__next__
 
         for _ in range(int(numBars)):
@@ -615,7 +859,10 @@ class Decoder:
         ) = fields
 
         self.parse(c)
-        self.wrapper.position(account, c, float(position or 0), float(avgCost or 0))
+        self.internContract(c)
+        self.wrapper.position(
+            self.intern(account), c, float(position or 0), float(avgCost or 0)
+        )
 
     def positionMulti(self, fields):
         c = Contract()
@@ -641,8 +888,14 @@ class Decoder:
         ) = fields
 
         self.parse(c)
+        self.internContract(c)
         self.wrapper.positionMulti(
-            int(reqId), account, modelCode, c, float(position or 0), float(avgCost or 0)
+            int(reqId),
+            self.intern(account),
+            self.intern(modelCode),
+            c,
+            float(position or 0),
+            float(avgCost or 0),
         )
 
     def securityDefinitionOptionParameter(self, fields):
@@ -777,6 +1030,12 @@ class Decoder:
 
     def historicalTicks(self, fields):
         _, reqId, n, *fields = fields
+        if int(reqId) in self.wrapper.columnarReqIds:
+            ticks = tickArray("MIDPOINT", fields, int(n))
+            done = bool(int(fields[-1]))
+            self.wrapper.historicalTicksColumns(int(reqId), ticks, done)
+            return
+
         get = iter(fields).__next__
 
         ticks = []
@@ -793,6 +1052,12 @@ class Decoder:
 
     def historicalTicksBidAsk(self, fields):
         _, reqId, n, *fields = fields
+        if int(reqId) in self.wrapper.columnarReqIds:
+            ticks = tickArray("BID_ASK", fields, int(n))
+            done = bool(int(fields[-1]))
+            self.wrapper.historicalTicksColumns(int(reqId), ticks, done)
+            return
+
         get = iter(fields).__next__
 
         ticks = []
@@ -816,6 +1081,12 @@ class Decoder:
 
     def historicalTicksLast(self, fields):
         _, reqId, n, *fields = fields
+        if int(reqId) in self.wrapper.columnarReqIds:
+            ticks = tickArray("TRADES", fields, int(n))
+            done = bool(int(fields[-1]))
+            self.wrapper.historicalTicksColumns(int(reqId), ticks, done)
+            return
+
         get = iter(fields).__next__
 
         ticks = []
@@ -825,8 +1096,8 @@ class Decoder:
             attrib = TickAttribLast(pastLimit=bool(mask & 1), unreported=bool(mask & 2))
             price = float(get())
             size = float(get())
-            exchange = get()
-            specialConditions = get()
+            exchange = self.intern(get())
+            specialConditions = self.intern(get())
             dt = datetime.fromtimestamp(time, self.wrapper.defaultTimezone)
             ticks.append(
                 HistoricalTickLast(dt, attrib, price, size, exchange, specialConditions)
@@ -835,10 +1106,20 @@ class Decoder:
         done = bool(int(get()))
         self.wrapper.historicalTicksLast(int(reqId), ticks, done)
 
+    def tickString(self, fields):
+        _, _, reqId, tickType, value = fields
+        ints = self._ints
+        tickType = ints[tickType]
+        if tickType in {32, 33, 84}:
+            # bid, ask or last exchange
+            value = self.intern(value)
+        self.wrapper.tickString(ints[reqId], tickType, value)
+
     def tickByTick(self, fields):
         _, reqId, tickType, time, *fields = fields
-        reqId = int(reqId)
-        tickType = int(tickType)
+        ints = self._ints
+        reqId = ints[reqId]
+        tickType = ints[tickType]
         time = int(time)
 
         if tickType in {1, 2}:
@@ -855,8 +1136,8 @@ class Decoder:
                 float(price),
                 float(size),
                 attrib,
-                exchange,
-                specialConditions,
+                self.intern(exchange),
+                self.intern(specialConditions),
             )
         elif tickType == 3:
             bidPrice, askPrice, bidSize, askSize, mask = fields
@@ -880,6 +1161,24 @@ class Decoder:
             self.wrapper.tickByTickMidPoint(reqId, time, float(midPoint))
 
     def openOrder(self, fields):
+        orderId = int(fields[1] or 0)
+        trade = self.wrapper.openOrderTrade(
+            int(fields[24] or 0), orderId, int(fields[25] or 0)
+        )
+        if trade:
+            # only the fields that can change are decoded for known trades
+            self.wrapper.openOrderUpdate(
+                orderId,
+                trade,
+                int(fields[25] or 0),
+                float(fields[14] or 0),
+                float(fields[16] or UNSET_DOUBLE),
+                float(fields[17] or UNSET_DOUBLE),
+                fields[15],
+                fields[23],
+            )
+            return
+
         o = Order()
         c = Contract()
         st = OrderState()
@@ -0,0 +1,151 @@
+"""Serialization of outgoing requests into the IB socket protocol."""
+
+import math
+import operator
+import struct
+from collections.abc import Callable
+from typing import Any, ClassVar
+
+from .contract import Contract
+from .util import UNSET_DOUBLE, UNSET_INTEGER
+
+_packLength = struct.Struct(">I").pack
+
+# the contract fields that are sent in the standard contract block
+_contractKey = operator.attrgetter(
+    "conId",
+    "symbol",
+    "secType",
+    "lastTradeDateOrContractMonth",
+    "strike",
+    "right",
+    "multiplier",
+    "exchange",
+    "primaryExchange",
+    "currency",
+    "localSymbol",
+    "tradingClass",
+)
+
+
+class Encoder:
+    """
+    Encode request fields into length-prefixed messages.
+
+    The field converters are set up once and the contract block of a
+    contract is cached, keyed by the values of its fields and the types
+    of its numeric fields, so that a contract is only stringified again
+    after it has been changed.
+
+    Message types that are sent in bursts have a precompiled layout of
+    the types of their leading fields. A field that has the type
+    from the layout is converted directly; Any other field falls back
+    to a lookup by type.
+
+    Parameters:
+      MaxCachedContracts (int):
+        Maximum number of cached contract blocks; The cache is cleared
+        when it grows beyond this size.
+    """
+
+    MaxCachedContracts = 10000
+
+    # leading field types per message id
+    Layouts: ClassVar[dict[int, tuple[type, ...]]] = {
+        # reqMktData
+        1: (int, int, int, Contract),
+        # placeOrder
+        3: (int, int, Contract, str, str, str, float, str, float, float, str),
+        # cancelOrder
+        4: (int, int, int, str),
+        # reqHistoricalData
+        20: (int, int, Contract, bool, str, str, str, bool, str, int),
+    }
+
+    def __init__(self):
+        self._contracts: dict[tuple, str] = {}
+        self._converters = {
+            makeEmpty: self._createConverters(makeEmpty) for makeEmpty in (True, False)
+        }
+        self._layouts = {
+            makeEmpty: {
+                msgId: tuple((typ, converters[typ]) for typ in types)
+                for msgId, types in self.Layouts.items()
+            }
+            for makeEmpty, converters in self._converters.items()
+        }
+
+    def encode(self, fields, makeEmpty: bool = True) -> bytes:
+        """
+        Encode the given fields into a length-prefixed message.
+
+        If 'makeEmpty' is True (default), then the IBKR values
+        representing "no value" become the empty string.
+        """
+        converters = self._converters[makeEmpty]
+        parts = []
+        n = 0
+        if fields and type(fields[0]) is int:
+            layout = self._layouts[makeEmpty].get(fields[0])
+            if layout:
+                for field, (typ, convert) in zip(fields, layout):
+                    if type(field) is not typ:
+                        convert = self._converter(converters, field)
+                    parts.append(convert(field))
+                n = len(parts)
+        for field in fields[n:] if n else fields:
+            parts.append(self._converter(converters, field)(field))
+        parts.append("")
+        msg = "\0".join(parts).encode()
+        return _packLength(len(msg)) + msg
+
+    def encodeContract(self, c: Contract) -> str:
+        """Get the null-delimited contract block of the given contract."""
+        values = _contractKey(c)
+        # equal numbers of a different type, such as 0 and 0.0,
+        # are stringified differently
+        key = (values, type(c.conId), type(c.strike))
+        s = self._contracts.get(key)
+        if s is None:
+            if len(self._contracts) >= self.MaxCachedContracts:
+                self._contracts.clear()
+            s = self._contracts[key] = "\0".join([str(f) for f in values])
+        return s
+
+    @staticmethod
+    def _converter(converters, field) -> Callable[[Any], str]:
+        # Contract subclasses are matched against the Contract parent class,
+        # anything else that is not known falls back to 'str(field)'
+        return converters.get(
+            Contract if isinstance(field, Contract) else type(field), str
+        )
+
+    def _createConverters(self, makeEmpty: bool) -> dict[Any, Callable[[Any], str]]:
+        if makeEmpty:
+
+            def convertFloat(f):
+                # 'IBKR unset' double is empty, infinity is 'Infinite'
+                if f == UNSET_DOUBLE:
+                    return ""
+                return "Infinite" if f == math.inf else str(f)
+
+            def convertInt(i):
+                return "" if i == UNSET_INTEGER else str(i)
+
+        else:
+
+            def convertFloat(f):
+                return "Infinite" if f == math.inf else str(f)
+
+            convertInt = str
+
+        return {
+            Contract: self.encodeContract,
+            float: convertFloat,
+            int: convertInt,
+            type(None): lambda _: "",
+            str: lambda s: s,
+            bool: lambda b: "1" if b else "0",
+            # lists of tags become semicolon-appended KV pairs
+            list: lambda lst: "".join([f"{v.tag}={v.value};" for v in lst]),
+        }
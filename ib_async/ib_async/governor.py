@@ -0,0 +1,409 @@
+"""Bounded memory use for long-running sessions."""
+
+import logging
+import pickle
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from types import FunctionType, MethodType, ModuleType
+from typing import TYPE_CHECKING, NamedTuple
+
+from eventkit import Event
+
+from ib_async.contract import Contract
+from ib_async.objects import (
+    BarData,
+    BarDataList,
+    CommissionReport,
+    Fill,
+    NewsBulletin,
+    NewsTick,
+    RealTimeBar,
+    RealTimeBarList,
+)
+from ib_async.order import Trade
+from ib_async.util import dataclassAsTuple, dataclassUpdate
+
+if TYPE_CHECKING:
+    from ib_async.wrapper import Wrapper
+
+_tables = ("trades", "fills", "newsTicks", "newsBulletins", "bars")
+
+_schema = """
+CREATE TABLE IF NOT EXISTS trades (
+    permId INTEGER, conId INTEGER, account TEXT, orderRef TEXT, data BLOB);
+CREATE INDEX IF NOT EXISTS tradesPermId ON trades (permId);
+CREATE INDEX IF NOT EXISTS tradesConId ON trades (conId);
+CREATE INDEX IF NOT EXISTS tradesAccount ON trades (account);
+CREATE INDEX IF NOT EXISTS tradesOrderRef ON trades (orderRef);
+CREATE TABLE IF NOT EXISTS fills (execId TEXT PRIMARY KEY, conId INTEGER, data BLOB);
+CREATE INDEX IF NOT EXISTS fillsConId ON fills (conId);
+CREATE TABLE IF NOT EXISTS newsTicks (data BLOB);
+CREATE TABLE IF NOT EXISTS newsBulletins (msgId INTEGER PRIMARY KEY, data BLOB);
+CREATE TABLE IF NOT EXISTS bars (reqId INTEGER, data BLOB);
+CREATE INDEX IF NOT EXISTS barsReqId ON bars (reqId);
+"""
+
+
+class CollectionUsage(NamedTuple):
+    numRecords: int
+    size: int
+    """ approximate size in bytes """
+
+
+class MemoryGovernor:
+    """
+    Keep the session state of a long-running session within budgets, by
+    evicting old records into a SQLite spill file.
+
+    Finished trades, fills, news ticks, news bulletins and the bars of
+    live bar subscriptions are evicted, oldest first, when there are more
+    than the budget or when they are older than ``maxAge``. Open trades
+    are never evicted, the fills of a trade are only evicted after the
+    trade and a bar list always keeps its last bar. Late messages for
+    evicted trades and fills are ignored, except for commission reports
+    which update the evicted fill. The spill file is where the evicted
+    trades and fills are looked up for this, so nothing of them is kept
+    in memory.
+
+    The spill file is emptied when the wrapper is reset on disconnect.
+
+    The :class:`.Wrapper` runs the governor after a network packet, at
+    most once every ``interval`` seconds. The evicted records stay
+    available through :meth:`.IB.trades`, :meth:`.IB.orders`,
+    :meth:`.IB.fills`, :meth:`.IB.executions`, :meth:`.IB.newsTicks` and
+    :meth:`.IB.newsBulletins`, as copies loaded from the spill file,
+    ahead of the records that are in memory. The evicted bars of a bar
+    list are available with :meth:`.bars`.
+
+    Example usage:
+
+    .. code-block:: python
+
+        ib = IB()
+        ib.wrapper.governor = MemoryGovernor('session.db', maxAge=3600)
+
+    Args:
+        path: The spill file, it is emptied when the governor is created.
+        maxAge: Age in seconds after which records are evicted;
+            0 is unlimited.
+        maxTrades: Maximum number of finished trades to keep;
+            0 is unlimited.
+        maxFills: Maximum number of fills to keep; 0 is unlimited.
+        maxNews: Maximum number of news ticks, and of news bulletins,
+            to keep; 0 is unlimited.
+        maxBars: Maximum number of bars to keep per bar list;
+            0 is unlimited.
+        interval: Minimum time in seconds between eviction runs.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        maxAge: float = 86400,
+        maxTrades: int = 1000,
+        maxFills: int = 10000,
+        maxNews: int = 1000,
+        maxBars: int = 10000,
+        interval: float = 60,
+    ):
+        self.path = path
+        self.maxAge = maxAge
+        self.maxTrades = maxTrades
+        self.maxFills = maxFills
+        self.maxNews = maxNews
+        self.maxBars = maxBars
+        self.interval = interval
+        self.nextRun = 0.0
+        self.evicted: dict[str, int] = dict.fromkeys(_tables, 0)
+        """ table -> number of records evicted into it """
+
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_schema)
+        self._logger = logging.getLogger("ib_async.governor")
+        self.clear()
+
+    def run(self, wrapper: "Wrapper", now: float = 0):
+        """
+        Evict the records of the wrapper that are over budget or older
+        than ``maxAge``, at time ``now`` (default now).
+        """
+        now = now or time.time()
+        self.nextRun = now + self.interval
+        cutoff = now - self.maxAge if self.maxAge else 0
+        with self._db:
+            self._evictTrades(wrapper, cutoff)
+            self._evictFills(wrapper, cutoff)
+            self._evictNews(wrapper, cutoff)
+            self._evictBars(wrapper, cutoff)
+
+    def clear(self):
+        """Empty the spill file, such as at the end of a session."""
+        with self._db:
+            for table in _tables:
+                self._db.execute(f"DELETE FROM {table}")
+        self.evicted.update(dict.fromkeys(_tables, 0))
+        self.nextRun = 0.0
+
+    def close(self):
+        self._db.close()
+
+    def isEvictedTrade(self, permId: int) -> bool:
+        """Is there an evicted trade with the given permId."""
+        return bool(permId) and _exists(
+            self._db, "SELECT 1 FROM trades WHERE permId = ?", permId
+        )
+
+    def isEvictedFill(self, execId: str) -> bool:
+        """Is there an evicted fill with the given execId."""
+        return _exists(self._db, "SELECT 1 FROM fills WHERE execId = ?", execId)
+
+    def updateCommissionReport(self, report: CommissionReport):
+        """Update the commission report of an evicted fill."""
+        row = self._db.execute(
+            "SELECT data FROM fills WHERE execId = ?", (report.execId,)
+        ).fetchone()
+        if row:
+            fill = pickle.loads(row[0])
+            dataclassUpdate(fill.commissionReport, report)
+            with self._db:
+                self._db.execute(
+                    "UPDATE fills SET data = ? WHERE execId = ?",
+                    (pickle.dumps(fill), report.execId),
+                )
+
+    def trades(
+        self, contract: Contract | None = None, account: str = "", orderRef: str = ""
+    ) -> list[Trade]:
+        """
+        Load the evicted trades, optionally filtered by the conId of
+        the contract, account and/or orderRef.
+        """
+        where = []
+        params: list[int | str] = []
+        if contract:
+            where.append("conId = ?")
+            params.append(contract.conId)
+        if account:
+            where.append("account = ?")
+            params.append(account)
+        if orderRef:
+            where.append("orderRef = ?")
+            params.append(orderRef)
+        sql = "SELECT data FROM trades"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return [
+            Trade(*pickle.loads(data))
+            for (data,) in self._db.execute(sql + " ORDER BY rowid", params)
+        ]
+
+    def fills(self, contract: Contract | None = None) -> list[Fill]:
+        """Load the evicted fills, optionally filtered by contract conId."""
+        if contract:
+            rows = self._db.execute(
+                "SELECT data FROM fills WHERE conId = ? ORDER BY rowid",
+                (contract.conId,),
+            )
+        else:
+            rows = self._db.execute("SELECT data FROM fills ORDER BY rowid")
+        return [pickle.loads(data) for (data,) in rows]
+
+    def newsTicks(self) -> list[NewsTick]:
+        """Load the evicted news ticks."""
+        rows = self._db.execute("SELECT data FROM newsTicks ORDER BY rowid")
+        return [pickle.loads(data) for (data,) in rows]
+
+    def newsBulletins(self) -> list[NewsBulletin]:
+        """Load the evicted news bulletins."""
+        rows = self._db.execute("SELECT data FROM newsBulletins ORDER BY rowid")
+        return [pickle.loads(data) for (data,) in rows]
+
+    def bars(self, bars: BarDataList | RealTimeBarList) -> list[BarData | RealTimeBar]:
+        """Load the evicted bars of the given bar list."""
+        rows = self._db.execute(
+            "SELECT data FROM bars WHERE reqId = ? ORDER BY rowid", (bars.reqId,)
+        )
+        return [pickle.loads(data) for (data,) in rows]
+
+    def _evictTrades(self, wrapper: "Wrapper", cutoff: float):
+        done = [(key, t) for key, t in wrapper.trades.items() if t.isDone()]
+        n = max(0, len(done) - self.maxTrades) if self.maxTrades else 0
+        rows = []
+        for i, (key, trade) in enumerate(done):
+            if (
+                i < n
+                or cutoff
+                and trade.log
+                and _timestamp(trade.log[-1].time) < cutoff
+            ):
+                wrapper.removeTrade(key)
+                order = trade.order
+                rows.append(
+                    (
+                        order.permId or trade.orderStatus.permId,
+                        trade.contract.conId,
+                        order.account,
+                        order.orderRef,
+                        pickle.dumps(dataclassAsTuple(trade)),
+                    )
+                )
+        self._spill("INSERT INTO trades VALUES (?, ?, ?, ?, ?)", "trades", rows)
+
+    def _evictFills(self, wrapper: "Wrapper", cutoff: float):
+        fills = wrapper.fills
+        permIds = {
+            trade.order.permId or trade.orderStatus.permId
+            for trade in wrapper.trades.values()
+        }
+        n = max(0, len(fills) - self.maxFills) if self.maxFills else 0
+        evict: list[Fill] = []
+        for fill in fills.values():
+            if fill.execution.permId in permIds:
+                # the fills of a trade stay with it until it is evicted
+                continue
+            if len(evict) < n or cutoff and _timestamp(fill.time) < cutoff:
+                evict.append(fill)
+        rows = []
+        for fill in evict:
+            wrapper.removeFill(fill.execution.execId)
+            rows.append(
+                (fill.execution.execId, fill.contract.conId, pickle.dumps(fill))
+            )
+        self._spill("INSERT OR REPLACE INTO fills VALUES (?, ?, ?)", "fills", rows)
+
+    def _evictNews(self, wrapper: "Wrapper", cutoff: float):
+        ticks = wrapper.newsTicks
+        n = max(0, len(ticks) - self.maxNews) if self.maxNews else 0
+        keep = []
+        tickRows = []
+        for i, tick in enumerate(ticks):
+            # the time stamp of a news tick is in milliseconds
+            if i < n or cutoff and tick.timeStamp / 1000 < cutoff:
+                tickRows.append((pickle.dumps(tick),))
+            else:
+                keep.append(tick)
+        if tickRows:
+            ticks[:] = keep
+            self._spill("INSERT INTO newsTicks VALUES (?)", "newsTicks", tickRows)
+
+        # bulletins have no time, so they are only evicted by count
+        bulletins = wrapper.msgId2NewsBulletin
+        n = max(0, len(bulletins) - self.maxNews) if self.maxNews else 0
+        bulletinRows = [
+            (msgId, pickle.dumps(bulletins.pop(msgId))) for msgId in list(bulletins)[:n]
+        ]
+        self._spill(
+            "INSERT OR REPLACE INTO newsBulletins VALUES (?, ?)",
+            "newsBulletins",
+            bulletinRows,
+        )
+
+    def _evictBars(self, wrapper: "Wrapper", cutoff: float):
+        for bars in wrapper.reqId2Subscriber.values():
+            if isinstance(bars, BarDataList):
+                times = [bar.date for bar in bars]
+            elif isinstance(bars, RealTimeBarList):
+                times = [bar.time for bar in bars]
+            else:
+                continue
+            # keep the last bar, it is the one that gets updated
+            last = len(bars) - 1
+            n = max(0, len(bars) - self.maxBars) if self.maxBars else 0
+            if cutoff:
+                while n < last and _timestamp(times[n]) < cutoff:
+                    n += 1
+            n = min(n, last)
+            if n > 0:
+                rows = [(bars.reqId, pickle.dumps(bar)) for bar in bars[:n]]
+                del bars[:n]
+                self._spill("INSERT INTO bars VALUES (?, ?)", "bars", rows)
+
+    def _spill(self, sql: str, table: str, rows: list[tuple]):
+        if rows:
+            self._db.executemany(sql, rows)
+            self.evicted[table] += len(rows)
+            self._logger.debug(f"Evicted {len(rows)} {table}")
+
+
+def memoryUsage(wrapper: "Wrapper") -> dict[str, CollectionUsage]:
+    """
+    Get the number of records and the approximate size in bytes of the
+    growing collections of the session state. The size of a collection
+    includes the objects that it shares with other collections.
+    """
+    bars = [
+        sub
+        for sub in wrapper.reqId2Subscriber.values()
+        if isinstance(sub, (BarDataList, RealTimeBarList))
+    ]
+    return {
+        "trades": CollectionUsage(
+            len(wrapper.trades),
+            _deepSize(
+                wrapper.trades,
+                wrapper.permId2Trade,
+                wrapper.openTrades,
+                wrapper.conId2Trades,
+                wrapper.account2Trades,
+                wrapper.orderRef2Trades,
+            ),
+        ),
+        "fills": CollectionUsage(
+            len(wrapper.fills), _deepSize(wrapper.fills, wrapper.conId2Fills)
+        ),
+        "newsTicks": CollectionUsage(
+            len(wrapper.newsTicks), _deepSize(wrapper.newsTicks)
+        ),
+        "newsBulletins": CollectionUsage(
+            len(wrapper.msgId2NewsBulletin), _deepSize(wrapper.msgId2NewsBulletin)
+        ),
+        "tickers": CollectionUsage(len(wrapper.tickers), _deepSize(wrapper.tickers)),
+        "bars": CollectionUsage(sum(len(b) for b in bars), _deepSize(*bars)),
+    }
+
+
+# not followed when sizing, they refer to the rest of the session
+_opaqueTypes = (Event, type, ModuleType, FunctionType, MethodType)
+
+
+def _deepSize(*objs) -> int:
+    size = 0
+    seen = set()
+    stack = list(objs)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _opaqueTypes):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack += obj.keys()
+            stack += obj.values()
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack += obj
+        elif not isinstance(obj, (str, bytes, int, float, date)):
+            d = getattr(obj, "__dict__", None)
+            if d is not None:
+                stack.append(d)
+            for cls in type(obj).__mro__:
+                slots = cls.__dict__.get("__slots__", ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    try:
+                        # without a fallback to __getattr__, which could
+                        # create lazy attributes
+                        stack.append(object.__getattribute__(obj, name))
+                    except AttributeError:
+                        pass
+    return size
+
+
+def _exists(db: sqlite3.Connection, sql: str, key: int | str) -> bool:
+    return db.execute(sql, (key,)).fetchone() is not None
+
+
+def _timestamp(t: date | datetime) -> float:
+    if isinstance(t, datetime):
+        return t.timestamp()
+    return datetime(t.year, t.month, t.day).timestamp()
@@ -6,8 +6,9 @@ import datetime
 import logging
 import time
 from enum import auto, Flag
-from typing import Any, Awaitable, Iterator, List, Optional, Union
+from typing import Any, Awaitable, Iterator, Literal, Optional, Union, overload
 
+import numpy as np
 from eventkit import Event
 
 import ib_async.util as util
@@ -43,6 +44,7 @@ from ib_async.objects import (
     TradeLogEntry,
     WshEventData,
 )
+from ib_async.governor import CollectionUsage, memoryUsage
 from ib_async.order import (
     BracketOrder,
     LimitOrder,
@@ -54,6 +56,7 @@ from ib_async.order import (
     Trade,
 )
 from ib_async.ticker import Ticker
+from ib_async.tickertable import TickerTable
 from ib_async.wrapper import Wrapper
 
 
@@ -148,6 +151,21 @@ class IB:
           if the number of sub-accounts exceeds this number (50 by default).
         TimezoneTWS (str): Specifies what timezone TWS (or gateway)
           is using. The default is to assume local system timezone.
+        TickRecords (bool): If False then no :class:`.TickData` records
+          are added to ``Ticker.ticks`` for price, size and generic ticks,
+          only the latest values of the ticker are updated. This saves
+          an allocation per tick for consumers that only read the latest
+          values. Default is True.
+        MaxTickerRate (float): Maximum number of updates per second for
+          a ticker, in both its ``updateEvent`` and ``pendingTickersEvent``.
+          The updates of a faster ticker are conflated: it is held back
+          and when released it has the latest values and all the ticks
+          since its previous update. The default of 0 is unlimited.
+        MaxPendingTickersRate (float): Maximum number of
+          ``pendingTickersEvent`` emits per second, the updated tickers
+          are conflated in between. The default of 0 is unlimited.
+          The number of conflated updates is counted in
+          ``wrapper.conflatedUpdates``.
 
     Events:
         * ``connectedEvent`` ():
@@ -162,6 +180,9 @@ class IB:
         * ``pendingTickersEvent`` (tickers: Set[:class:`.Ticker`]):
           Emits the set of tickers that have been updated during the last
           update and for which there are new ticks, tickByTicks or domTicks.
+          The set and the ticks lists of the tickers are reused and cleared
+          on the next network packet (or conflated emit), make a copy to
+          keep them longer.
 
         * ``barUpdateEvent`` (bars: :class:`.BarDataList`,
           hasNewBar: bool): Emits the bar list that has been updated in
@@ -272,6 +293,9 @@ class IB:
     RaiseRequestErrors: bool = False
     MaxSyncedSubAccounts: int = 50
     TimezoneTWS: str = ""
+    TickRecords: bool = True
+    MaxTickerRate: float = 0
+    MaxPendingTickersRate: float = 0
 
     def __init__(self, defaults: IBDefaults = IBDefaults()):
         self._createEvents()
@@ -591,37 +615,118 @@ class IB:
             and (not conId or v.conId == conId)
         ]
 
-    def trades(self) -> list[Trade]:
-        """List of all order trades from this session."""
-        return list(self.wrapper.trades.values())
+    def trades(
+        self, contract: Contract | None = None, account: str = "", orderRef: str = ""
+    ) -> list[Trade]:
+        """
+        List of all order trades from this session,
+        optionally filtered by contract, account and/or orderRef.
 
-    def openTrades(self) -> list[Trade]:
-        """List of all open order trades."""
-        return [
-            v
-            for v in self.wrapper.trades.values()
-            if v.orderStatus.status not in OrderStatus.DoneStates
-        ]
+        Args:
+            contract: If specified, filter for the trades of the contract
+                with this conId.
+            account: If specified, filter for this account name.
+            orderRef: If specified, filter for this order reference.
+        """
+        trades = self._findTrades(False, contract, account, orderRef)
+        governor = self.wrapper.governor
+        if governor:
+            # the evicted trades, except those that are known again
+            permIds = self.wrapper.permId2Trade
+            trades = [
+                trade
+                for trade in governor.trades(contract, account, orderRef)
+                if not trade.order.permId or trade.order.permId not in permIds
+            ] + trades
+        return trades
+
+    def openTrades(
+        self, contract: Contract | None = None, account: str = "", orderRef: str = ""
+    ) -> list[Trade]:
+        """
+        List of all open order trades,
+        optionally filtered by contract, account and/or orderRef.
+
+        Args:
+            contract: If specified, filter for the trades of the contract
+                with this conId.
+            account: If specified, filter for this account name.
+            orderRef: If specified, filter for this order reference.
+        """
+        return self._findTrades(True, contract, account, orderRef)
 
     def orders(self) -> list[Order]:
         """List of all orders from this session."""
-        return list(trade.order for trade in self.wrapper.trades.values())
+        return [trade.order for trade in self.trades()]
 
     def openOrders(self) -> list[Order]:
         """List of all open orders."""
+        return [trade.order for trade in self.wrapper.openTrades.values()]
+
+    def _findTrades(
+        self,
+        openOnly: bool,
+        contract: Contract | None,
+        account: str,
+        orderRef: str,
+    ) -> list[Trade]:
+        # start from the smallest index and check the other filters
+        w = self.wrapper
+        trades: dict[int, Trade]
+        if contract:
+            trades = w.conId2Trades.get(contract.conId, {})
+        elif orderRef:
+            trades = w.orderRef2Trades.get(orderRef, {})
+        elif account:
+            trades = w.account2Trades.get(account, {})
+        elif openOnly:
+            return list(w.openTrades.values())
+        else:
+            return list(w.trades.values())
+
         return [
-            trade.order
-            for trade in self.wrapper.trades.values()
-            if trade.orderStatus.status not in OrderStatus.DoneStates
+            trade
+            for trade in trades.values()
+            if (not contract or trade.contract.conId == contract.conId)
+            and (not account or trade.order.account == account)
+            and (not orderRef or trade.order.orderRef == orderRef)
+            and (not openOnly or id(trade) in w.openTrades)
         ]
 
-    def fills(self) -> list[Fill]:
-        """List of all fills from this session."""
-        return list(self.wrapper.fills.values())
+    def fills(self, contract: Contract | None = None) -> list[Fill]:
+        """
+        List of all fills from this session,
+        optionally filtered by contract.
 
-    def executions(self) -> list[Execution]:
-        """List of all executions from this session."""
-        return list(fill.execution for fill in self.wrapper.fills.values())
+        Args:
+            contract: If specified, filter for the fills of the contract
+                with this conId.
+        """
+        if contract:
+            fills = list(self.wrapper.conId2Fills.get(contract.conId, {}).values())
+        else:
+            fills = list(self.wrapper.fills.values())
+        governor = self.wrapper.governor
+        if governor:
+            # the evicted fills, except those that are known again
+            execIds = self.wrapper.fills
+            fills = [
+                fill
+                for fill in governor.fills(contract)
+                if fill.execution.execId not in execIds
+            ] + fills
+        return fills
+
+    def executions(self, contract: Contract | None = None) -> list[Execution]:
+        """
+        List of all executions from this session,
+        optionally filtered by contract.
+
+        Args:
+            contract: If specified, filter for the executions of the
+                contract with this conId.
+        """
+        return [fill.execution for fill in self.fills(contract)]
 
     def ticker(self, contract: Contract) -> Optional[Ticker]:
         """
@@ -642,6 +747,19 @@ class IB:
         """Get a list of all tickers that have pending ticks or domTicks."""
         return list(self.wrapper.pendingTickers)
 
+    def tickerTable(self) -> TickerTable:
+        """
+        Get the :class:`.TickerTable` with the latest market data of all
+        tickers in NumPy columns. The table is created, and from then on
+        kept up to date, on the first call.
+        """
+        table = self.wrapper.tickerTable
+        if table is None:
+            table = self.wrapper.tickerTable = TickerTable()
+            for ticker in self.wrapper.tickers.values():
+                table.update(ticker)
+        return table
+
     def realtimeBars(self) -> list[Union[BarDataList, RealTimeBarList]]:
         """
         Get a list of all live updated bars. These can be 5 second realtime
@@ -654,11 +772,32 @@ class IB:
         List of ticks with headline news.
         The article itself can be retrieved with :meth:`.reqNewsArticle`.
         """
+        governor = self.wrapper.governor
+        if governor:
+            return governor.newsTicks() + self.wrapper.newsTicks
         return self.wrapper.newsTicks
 
     def newsBulletins(self) -> list[NewsBulletin]:
         """List of IB news bulletins."""
-        return list(self.wrapper.msgId2NewsBulletin.values())
+        bulletins = list(self.wrapper.msgId2NewsBulletin.values())
+        governor = self.wrapper.governor
+        if governor:
+            msgIds = self.wrapper.msgId2NewsBulletin
+            bulletins = [
+                bulletin
+                for bulletin in governor.newsBulletins()
+                if bulletin.msgId not in msgIds
+            ] + bulletins
+        return bulletins
+
+    def memoryUsage(self) -> dict[str, CollectionUsage]:
+        """
+        Get the number of records and the approximate size in bytes of
+        the collections of the session state that grow over time,
+        by collection name. See :class:`.MemoryGovernor` to keep them
+        bounded.
+        """
+        return memoryUsage(self.wrapper)
 
     def reqTickers(
         self, *contracts: Contract, regulatorySnapshot: bool = False
@@ -797,6 +936,7 @@ class IB:
             assert trade.orderStatus.status not in OrderStatus.DoneStates
             logEntry = TradeLogEntry(now, trade.orderStatus.status, "Modify")
             trade.log.append(logEntry)
+            self.wrapper.indexTrade(trade)
             self._logger.info(f"placeOrder: Modify order {trade}")
             trade.modifyEvent.emit(trade)
             self.orderModifyEvent.emit(trade)
@@ -807,7 +947,7 @@ class IB:
             orderStatus = OrderStatus(orderId=orderId, status=OrderStatus.PendingSubmit)
             logEntry = TradeLogEntry(now, orderStatus.status)
             trade = Trade(contract, order, orderStatus, [], [logEntry])
-            self.wrapper.trades[key] = trade
+            self.wrapper.addTrade(key, trade)
             self._logger.info(f"placeOrder: New order {trade}")
             self.newOrderEvent.emit(trade)
 
@@ -842,6 +982,7 @@ class IB:
                 logEntry = TradeLogEntry(now, newStatus)
                 trade.log.append(logEntry)
                 trade.orderStatus.status = newStatus
+                self.wrapper.indexTrade(trade)
                 self._logger.info(f"cancelOrder: {trade}")
                 trade.cancelEvent.emit(trade)
                 trade.statusEvent.emit(trade)
@@ -1164,6 +1305,55 @@ class IB:
         self.client.cancelRealTimeBars(bars.reqId)
         self.wrapper.endSubscription(bars)
 
+    @overload
+    def reqHistoricalData(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] = ...,
+        timeout: float = ...,
+        columnar: Literal[False] = ...,
+    ) -> BarDataList: ...
+
+    @overload
+    def reqHistoricalData(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] = ...,
+        timeout: float = ...,
+        *,
+        columnar: Literal[True],
+    ) -> np.ndarray: ...
+
+    @overload
+    def reqHistoricalData(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] = ...,
+        timeout: float = ...,
+        columnar: bool = ...,
+    ) -> BarDataList | np.ndarray: ...
+
     def reqHistoricalData(
         self,
         contract: Contract,
@@ -1176,7 +1366,8 @@ class IB:
         keepUpToDate: bool = False,
         chartOptions: list[TagValue] = [],
         timeout: float = 60,
-    ) -> BarDataList:
+        columnar: bool = False,
+    ) -> BarDataList | np.ndarray:
         """
         Request historical bar data.
 
@@ -1218,6 +1409,11 @@ class IB:
             timeout: Timeout in seconds after which to cancel the request
                 and return an empty bar series. Set to ``0`` to wait
                 indefinitely.
+            columnar: If True then the bars are decoded straight into a
+                NumPy structured array (see :func:`.util.barArray`) with
+                the dates as int64 epoch seconds, instead of a
+                :class:`.BarDataList`. This can't be combined with
+                ``keepUpToDate`` and ignores ``formatDate``.
         """
         return self._run(
             self.reqHistoricalDataAsync(
@@ -1231,6 +1427,7 @@ class IB:
                 keepUpToDate,
                 chartOptions,
                 timeout,
+                columnar,
             )
         )
 
@@ -1272,6 +1469,49 @@ class IB:
             self.reqHistoricalScheduleAsync(contract, numDays, endDateTime, useRTH)
         )
 
+    @overload
+    def reqHistoricalTicks(
+        self,
+        contract: Contract,
+        startDateTime: str | datetime.date,
+        endDateTime: str | datetime.date,
+        numberOfTicks: int,
+        whatToShow: str,
+        useRth: bool,
+        ignoreSize: bool = ...,
+        miscOptions: list[TagValue] = ...,
+        columnar: Literal[False] = ...,
+    ) -> list: ...
+
+    @overload
+    def reqHistoricalTicks(
+        self,
+        contract: Contract,
+        startDateTime: str | datetime.date,
+        endDateTime: str | datetime.date,
+        numberOfTicks: int,
+        whatToShow: str,
+        useRth: bool,
+        ignoreSize: bool = ...,
+        miscOptions: list[TagValue] = ...,
+        *,
+        columnar: Literal[True],
+    ) -> np.ndarray: ...
+
+    @overload
+    def reqHistoricalTicks(
+        self,
+        contract: Contract,
+        startDateTime: str | datetime.date,
+        endDateTime: str | datetime.date,
+        numberOfTicks: int,
+        whatToShow: str,
+        useRth: bool,
+        ignoreSize: bool = ...,
+        miscOptions: list[TagValue] = ...,
+        columnar: bool = ...,
+    ) -> list | np.ndarray: ...
+
     def reqHistoricalTicks(
         self,
         contract: Contract,
@@ -1282,7 +1522,8 @@ class IB:
         useRth: bool,
         ignoreSize: bool = False,
         miscOptions: list[TagValue] = [],
-    ) -> List:
+        columnar: bool = False,
+    ) -> list | np.ndarray:
         """
         Request historical ticks. The time resolution of the ticks
         is one second.
@@ -1307,6 +1548,11 @@ class IB:
                 Trading Hours, if False then show all data.
             ignoreSize: Ignore bid/ask ticks that only update the size.
             miscOptions: Unknown.
+            columnar: If True then the ticks are decoded straight into a
+                NumPy structured array (see :func:`.util.tickArray`) with
+                the times as int64 epoch seconds, instead of a list of
+                ticks. Use :func:`.util.epochToDatetime` to convert the
+                times to datetimes.
         """
         return self._run(
             self.reqHistoricalTicksAsync(
@@ -1318,6 +1564,7 @@ class IB:
                 useRth,
                 ignoreSize,
                 miscOptions,
+                columnar,
             )
         )
 
@@ -1539,8 +1786,6 @@ class IB:
         ticker = self.wrapper.startTicker(reqId, contract, "mktDepth")
         ticker.domBids.clear()
         ticker.domAsks.clear()
-        ticker.domBidsDict.clear()
-        ticker.domAsksDict.clear()
         self.client.reqMktDepth(reqId, contract, numRows, isSmartDepth, mktDepthOptions)
         return ticker
 
@@ -1561,8 +1806,6 @@ class IB:
             # being updated after the cancel request.
             ticker.domBids.clear()
             ticker.domAsks.clear()
-            ticker.domBidsDict.clear()
-            ticker.domAsksDict.clear()
         else:
             self._logger.error(
                 f"cancelMktDepth: No reqId found for contract {contract}"
@@ -2322,6 +2565,55 @@ class IB:
             self._logger.error("reqMarketRuleAsync: Timeout")
             return None
 
+    @overload
+    async def reqHistoricalDataAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] = ...,
+        timeout: float = ...,
+        columnar: Literal[False] = ...,
+    ) -> BarDataList: ...
+
+    @overload
+    async def reqHistoricalDataAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] = ...,
+        timeout: float = ...,
+        *,
+        columnar: Literal[True],
+    ) -> np.ndarray: ...
+
+    @overload
+    async def reqHistoricalDataAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] = ...,
+        timeout: float = ...,
+        columnar: bool = ...,
+    ) -> BarDataList | np.ndarray: ...
+
     async def reqHistoricalDataAsync(
         self,
         contract: Contract,
@@ -2334,7 +2626,21 @@ class IB:
         keepUpToDate: bool = False,
         chartOptions: list[TagValue] = [],
         timeout: float = 60,
-    ) -> BarDataList:
+        columnar: bool = False,
+    ) -> BarDataList | np.ndarray:
+        if columnar:
+            return await self._reqHistoricalColumnsAsync(
+                contract,
+                endDateTime,
+                durationStr,
+                barSizeSetting,
+                whatToShow,
+                useRTH,
+                keepUpToDate,
+                chartOptions,
+                timeout,
+            )
+
         reqId = self.client.getReqId()
         bars = BarDataList()
         bars.reqId = reqId
@@ -2373,6 +2679,49 @@ class IB:
 
         return bars
 
+    async def _reqHistoricalColumnsAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        keepUpToDate: bool,
+        chartOptions: list[TagValue],
+        timeout: float,
+    ) -> np.ndarray:
+        if keepUpToDate:
+            raise ValueError("columnar bars can't be kept up to date")
+        reqId = self.client.getReqId()
+        # the (empty) result in case of timeout or error
+        future = self.wrapper.startReq(reqId, contract, container=util.barArray())
+        self.wrapper.columnarReqIds.add(reqId)
+        end = util.formatIBDatetime(endDateTime)
+        self.client.reqHistoricalData(
+            reqId,
+            contract,
+            end,
+            durationStr,
+            barSizeSetting,
+            whatToShow,
+            useRTH,
+            2,
+            False,
+            chartOptions,
+        )
+        task = asyncio.wait_for(future, timeout) if timeout else future
+        try:
+            bars = await task
+        except asyncio.TimeoutError:  # noqa: UP041, not an alias on 3.10
+            self.client.cancelHistoricalData(reqId)
+            self._logger.warning(f"reqHistoricalData: Timeout for {contract}")
+            bars = util.barArray()
+        finally:
+            self.wrapper.columnarReqIds.discard(reqId)
+
+        return bars
+
     def reqHistoricalScheduleAsync(
         self,
         contract: Contract,
@@ -2398,6 +2747,49 @@ class IB:
 
         return future
 
+    @overload
+    def reqHistoricalTicksAsync(
+        self,
+        contract: Contract,
+        startDateTime: str | datetime.date,
+        endDateTime: str | datetime.date,
+        numberOfTicks: int,
+        whatToShow: str,
+        useRth: bool,
+        ignoreSize: bool = ...,
+        miscOptions: list[TagValue] = ...,
+        columnar: Literal[False] = ...,
+    ) -> Awaitable[list]: ...
+
+    @overload
+    def reqHistoricalTicksAsync(
+        self,
+        contract: Contract,
+        startDateTime: str | datetime.date,
+        endDateTime: str | datetime.date,
+        numberOfTicks: int,
+        whatToShow: str,
+        useRth: bool,
+        ignoreSize: bool = ...,
+        miscOptions: list[TagValue] = ...,
+        *,
+        columnar: Literal[True],
+    ) -> Awaitable[np.ndarray]: ...
+
+    @overload
+    def reqHistoricalTicksAsync(
+        self,
+        contract: Contract,
+        startDateTime: str | datetime.date,
+        endDateTime: str | datetime.date,
+        numberOfTicks: int,
+        whatToShow: str,
+        useRth: bool,
+        ignoreSize: bool = ...,
+        miscOptions: list[TagValue] = ...,
+        columnar: bool = ...,
+    ) -> Awaitable[list | np.ndarray]: ...
+
     def reqHistoricalTicksAsync(
         self,
         contract: Contract,
@@ -2408,7 +2800,20 @@ class IB:
         useRth: bool,
         ignoreSize: bool = False,
         miscOptions: list[TagValue] = [],
-    ) -> Awaitable[List]:
+        columnar: bool = False,
+    ) -> Awaitable[list | np.ndarray]:
+        if columnar:
+            return self._reqHistoricalTicksColumnsAsync(
+                contract,
+                startDateTime,
+                endDateTime,
+                numberOfTicks,
+                whatToShow,
+                useRth,
+                ignoreSize,
+                miscOptions,
+            )
+
         reqId = self.client.getReqId()
         future = self.wrapper.startReq(reqId, contract)
         start = util.formatIBDatetime(startDateTime)
@@ -2426,6 +2831,43 @@ class IB:
         )
         return future
 
+    async def _reqHistoricalTicksColumnsAsync(
+        self,
+        contract: Contract,
+        startDateTime: str | datetime.date,
+        endDateTime: str | datetime.date,
+        numberOfTicks: int,
+        whatToShow: str,
+        useRth: bool,
+        ignoreSize: bool,
+        miscOptions: list[TagValue],
+    ) -> np.ndarray:
+        reqId = self.client.getReqId()
+        # the arrays of the individual messages are collected in a list
+        future = self.wrapper.startReq(reqId, contract)
+        self.wrapper.columnarReqIds.add(reqId)
+        start = util.formatIBDatetime(startDateTime)
+        end = util.formatIBDatetime(endDateTime)
+        self.client.reqHistoricalTicks(
+            reqId,
+            contract,
+            start,
+            end,
+            numberOfTicks,
+            whatToShow,
+            useRth,
+            ignoreSize,
+            miscOptions,
+        )
+        try:
+            chunks = await future
+        finally:
+            self.wrapper.columnarReqIds.discard(reqId)
+
+        if not chunks:
+            return util.tickArray(whatToShow)
+        return np.concatenate(chunks)
+
     async def reqHeadTimeStampAsync(
         self, contract: Contract, whatToShow: str, useRTH: bool, formatDate: int
     ) -> datetime.datetime:
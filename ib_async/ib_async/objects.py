@@ -453,6 +453,32 @@ class ConnectionStats:
     numMsgSent: int
 
 
+@dataclass(slots=True, frozen=True)
+class ThrottleStats:
+    isThrottling: bool
+    numRecentRequests: int
+    numOrdersQueued: int
+    numAccountQueued: int
+    numDataQueued: int
+
+
+@dataclass(slots=True, frozen=True)
+class DecoderStats:
+    """
+    Decoding statistics of one message type.
+
+    The histogram counts the messages by the time (in nanoseconds) it
+    took to decode and handle them: Bucket ``i`` counts the times ``t``
+    with ``2 ** (i - 1) <= t < 2 ** i``.
+    """
+
+    msgId: int
+    handler: str
+    count: int
+    totalTime: float
+    histogram: tuple[int, ...]
+
+
 class BarDataList(List[BarData]):
     """
     List of :class:`.BarData` that also stores all request parameters.
@@ -442,6 +442,10 @@ class Trade:
         self.cancelEvent = Event("cancelEvent")
         self.cancelledEvent = Event("cancelledEvent")
 
+        # running total of the shares of the first _numFilled fills
+        self._numFilled = 0
+        self._filled = 0.0
+
     def isWaiting(self) -> bool:
         """True if sent to IBKR but not "Submitted" for live execution yet."""
         return self.orderStatus.status in OrderStatus.WaitingStates
@@ -461,11 +465,21 @@ class Trade:
     def filled(self) -> float:
         """Number of shares filled."""
         fills = self.fills
-        if self.contract.secType == "BAG":
-            # don't count fills for the leg contracts
-            fills = [f for f in fills if f.contract.secType == "BAG"]
-
-        return sum([f.execution.shares for f in fills])
+        n = len(fills)
+        if n != self._numFilled:
+            if n < self._numFilled:
+                # the fills list has been replaced
+                self._numFilled = 0
+                self._filled = 0.0
+
+            isBag = self.contract.secType == "BAG"
+            for f in fills[self._numFilled :]:
+                # don't count fills for the leg contracts
+                if not isBag or f.contract.secType == "BAG":
+                    self._filled += f.execution.shares
+            self._numFilled = n
+
+        return self._filled
 
     def remaining(self) -> float:
         """Number of shares remaining to be filled."""
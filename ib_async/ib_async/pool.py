@@ -0,0 +1,416 @@
+"""Pool of IB connections that share the market data load."""
+
+import asyncio
+import datetime
+import logging
+from collections.abc import Awaitable
+from typing import Literal, overload
+
+import numpy as np
+from eventkit import Event
+
+from ib_async import util
+from ib_async.contract import Contract
+from ib_async.ib import IB, StartupFetch, StartupFetchALL, StartupFetchNONE
+from ib_async.objects import BarDataList, IBDefaults, TagValue
+from ib_async.ticker import Ticker
+
+
+class IBPool:
+    """
+    Pool of several :class:`.IB` connections, each with its own client ID,
+    that spreads market data and historical data requests over the
+    connections. Every connection has its own socket, decoder and
+    request throttling budget.
+
+    The first connection is the primary connection. All order and
+    account state is kept on the primary connection, and any
+    attribute that is not defined by the pool itself, such as
+    :meth:`.IB.placeOrder`, :meth:`.IB.positions` or
+    ``orderStatusEvent``, is that of the primary connection.
+
+    New market data and historical data requests are placed on the
+    connection with the fewest active subscriptions and pending requests.
+    A request for a contract that already has a ticker stays on the
+    connection of that ticker.
+
+    Example usage:
+
+    .. code-block:: python
+
+        pool = IBPool(3)
+        pool.connect('127.0.0.1', 7497, clientId=10)
+        tickers = [pool.reqMktData(c) for c in contracts]
+        pool.pendingTickersEvent += onPendingTickers
+        trade = pool.placeOrder(contract, order)
+
+    Args:
+        size: Number of connections.
+        defaults: Defaults to use for all connections.
+
+    Events:
+        * ``pendingTickersEvent`` (tickers: Set[:class:`.Ticker`]):
+          Emits the updated tickers of any of the connections.
+    """
+
+    events = ("pendingTickersEvent",)
+
+    def __init__(self, size: int = 2, defaults: IBDefaults | None = None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        defaults = defaults or IBDefaults()
+        self.ibs = [IB(defaults) for _ in range(size)]
+        self.pendingTickersEvent = Event("pendingTickersEvent")
+        for ib in self.ibs:
+            ib.pendingTickersEvent += self.pendingTickersEvent
+        self._logger = logging.getLogger("ib_async.pool")
+
+    def __getattr__(self, name):
+        # everything else is served by the primary connection
+        if name == "ibs":
+            raise AttributeError(name)
+        return getattr(self.ibs[0], name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.disconnect()
+
+    def __repr__(self):
+        clientIds = [ib.client.clientId for ib in self.ibs if ib.isConnected()]
+        conn = f"clientIds={clientIds}" if clientIds else "not connected"
+        return f"<{self.__class__.__qualname__} {conn}>"
+
+    @property
+    def primary(self) -> IB:
+        """The connection that handles orders and account state."""
+        return self.ibs[0]
+
+    def connect(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 7497,
+        clientId: int = 1,
+        timeout: int = 20,
+        readonly: bool = False,
+        account: str = "",
+        raiseSyncErrors: bool = False,
+        fetchFields: StartupFetch = StartupFetchALL,
+    ):
+        """
+        Connect all connections of the pool, using consecutive client IDs
+        starting from ``clientId`` for the primary connection.
+        The arguments are the same as for :meth:`.IB.connect`;
+        The secondary connections don't fetch any order or account state.
+
+        This method is blocking.
+        """
+        return util.run(
+            self.connectAsync(
+                host,
+                port,
+                clientId,
+                timeout,
+                readonly,
+                account,
+                raiseSyncErrors,
+                fetchFields,
+            )
+        )
+
+    async def connectAsync(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 7497,
+        clientId: int = 1,
+        timeout: int = 20,
+        readonly: bool = False,
+        account: str = "",
+        raiseSyncErrors: bool = False,
+        fetchFields: StartupFetch = StartupFetchALL,
+    ):
+        clientId = int(clientId)
+        try:
+            await self.primary.connectAsync(
+                host,
+                port,
+                clientId,
+                timeout,
+                readonly,
+                account,
+                raiseSyncErrors,
+                fetchFields,
+            )
+            await asyncio.gather(
+                *(
+                    ib.connectAsync(
+                        host,
+                        port,
+                        clientId + i,
+                        timeout,
+                        True,
+                        account,
+                        raiseSyncErrors,
+                        StartupFetchNONE,
+                    )
+                    for i, ib in enumerate(self.ibs[1:], 1)
+                )
+            )
+        except BaseException:
+            self.disconnect()
+            raise
+
+        return self
+
+    def disconnect(self):
+        """Disconnect all connections."""
+        for ib in reversed(self.ibs):
+            ib.disconnect()
+
+    def isConnected(self) -> bool:
+        """Are all connections of the pool connected?"""
+        return all(ib.isConnected() for ib in self.ibs)
+
+    def ticker(self, contract: Contract) -> Ticker | None:
+        """
+        Get ticker of the given contract from whichever connection
+        it has been requested on.
+
+        Args:
+            contract: Contract to get ticker for.
+        """
+        ib = self._connectionOf(contract)
+        return ib.ticker(contract) if ib else None
+
+    def tickers(self) -> list[Ticker]:
+        """Get a list of all tickers of all connections."""
+        return [t for ib in self.ibs for t in ib.wrapper.tickers.values()]
+
+    def pendingTickers(self) -> list[Ticker]:
+        """Get a list of all pending tickers of all connections."""
+        return [t for ib in self.ibs for t in ib.wrapper.pendingTickers]
+
+    def reqMktData(
+        self,
+        contract: Contract,
+        genericTickList: str = "",
+        snapshot: bool = False,
+        regulatorySnapshot: bool = False,
+        mktDataOptions: list[TagValue] | None = None,
+    ) -> Ticker:
+        """
+        Subscribe to tick data or request a snapshot on the least
+        loaded connection. See :meth:`.IB.reqMktData`.
+        """
+        ib = self._connectionOf(contract) or self._leastLoaded()
+        return ib.reqMktData(
+            contract,
+            genericTickList,
+            snapshot,
+            regulatorySnapshot,
+            mktDataOptions or [],
+        )
+
+    def cancelMktData(self, contract: Contract) -> bool:
+        """
+        Unsubscribe from realtime streaming tick data.
+        See :meth:`.IB.cancelMktData`.
+        """
+        ib = self._connectionOf(contract) or self.primary
+        return ib.cancelMktData(contract)
+
+    @overload
+    def reqHistoricalData(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] | None = ...,
+        timeout: float = ...,
+        columnar: Literal[False] = ...,
+    ) -> BarDataList: ...
+
+    @overload
+    def reqHistoricalData(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] | None = ...,
+        timeout: float = ...,
+        *,
+        columnar: Literal[True],
+    ) -> np.ndarray: ...
+
+    @overload
+    def reqHistoricalData(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] | None = ...,
+        timeout: float = ...,
+        columnar: bool = ...,
+    ) -> BarDataList | np.ndarray: ...
+
+    def reqHistoricalData(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = 1,
+        keepUpToDate: bool = False,
+        chartOptions: list[TagValue] | None = None,
+        timeout: float = 60,
+        columnar: bool = False,
+    ) -> BarDataList | np.ndarray:
+        """
+        Request historical bar data on the least loaded connection.
+        See :meth:`.IB.reqHistoricalData`.
+
+        This method is blocking.
+        """
+        return util.run(
+            self.reqHistoricalDataAsync(
+                contract,
+                endDateTime,
+                durationStr,
+                barSizeSetting,
+                whatToShow,
+                useRTH,
+                formatDate,
+                keepUpToDate,
+                chartOptions,
+                timeout,
+                columnar,
+            ),
+            timeout=self.primary.RequestTimeout,
+        )
+
+    @overload
+    def reqHistoricalDataAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] | None = ...,
+        timeout: float = ...,
+        columnar: Literal[False] = ...,
+    ) -> Awaitable[BarDataList]: ...
+
+    @overload
+    def reqHistoricalDataAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] | None = ...,
+        timeout: float = ...,
+        *,
+        columnar: Literal[True],
+    ) -> Awaitable[np.ndarray]: ...
+
+    @overload
+    def reqHistoricalDataAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = ...,
+        keepUpToDate: bool = ...,
+        chartOptions: list[TagValue] | None = ...,
+        timeout: float = ...,
+        columnar: bool = ...,
+    ) -> Awaitable[BarDataList | np.ndarray]: ...
+
+    def reqHistoricalDataAsync(
+        self,
+        contract: Contract,
+        endDateTime: datetime.datetime | datetime.date | str | None,
+        durationStr: str,
+        barSizeSetting: str,
+        whatToShow: str,
+        useRTH: bool,
+        formatDate: int = 1,
+        keepUpToDate: bool = False,
+        chartOptions: list[TagValue] | None = None,
+        timeout: float = 60,
+        columnar: bool = False,
+    ) -> Awaitable[BarDataList | np.ndarray]:
+        return self._leastLoaded().reqHistoricalDataAsync(
+            contract,
+            endDateTime,
+            durationStr,
+            barSizeSetting,
+            whatToShow,
+            useRTH,
+            formatDate,
+            keepUpToDate,
+            chartOptions or [],
+            timeout,
+            columnar,
+        )
+
+    def cancelHistoricalData(self, bars: BarDataList):
+        """
+        Cancel the update subscription for the historical bars.
+        See :meth:`.IB.cancelHistoricalData`.
+        """
+        for ib in self.ibs:
+            if ib.wrapper.reqId2Subscriber.get(bars.reqId) is bars:
+                ib.cancelHistoricalData(bars)
+                break
+
+    def load(self, ib: IB) -> int:
+        """
+        The load of a connection: The number of active tick subscriptions,
+        live bar subscriptions and pending requests.
+        """
+        w = ib.wrapper
+        return (
+            sum(len(reqIds) for reqIds in w.ticker2ReqId.values())
+            + len(w.reqId2Subscriber)
+            + len(w._futures)
+        )
+
+    def _leastLoaded(self) -> IB:
+        return min(self.ibs, key=self.load)
+
+    def _connectionOf(self, contract: Contract) -> IB | None:
+        key = hash(contract)
+        for ib in self.ibs:
+            if key in ib.wrapper.tickers:
+                return ib
+        return None
@@ -0,0 +1,279 @@
+"""Capture and replay of the raw incoming socket data."""
+
+import asyncio
+import glob
+import logging
+import os
+import struct
+import time
+from collections.abc import Iterator
+from typing import BinaryIO
+
+from ib_async.client import Client
+from ib_async.contract import ComboLeg, Contract
+
+_header = struct.Struct("<dI")
+
+# flag in the byte count of a record with an outgoing message
+OUTGOING = 1 << 31
+
+MAGIC = b"IBCAP001"
+
+
+class Recorder:
+    """
+    Record the raw bytes that arrive on a connection, with the time of
+    arrival, into capture files. The outgoing messages are recorded too,
+    so that a replay knows what the recorded request ids belong to.
+
+    A capture file starts with an 8 byte magic marker, followed by one
+    record per network read or sent message: A little-endian double
+    with the epoch time, a 32 bit unsigned byte count and then the bytes
+    themselves. The highest bit of the byte count is set for an
+    outgoing message.
+
+    When a file grows beyond ``maxFileSize`` bytes, recording continues
+    in the next file. The files are named ``<path>.<index>`` with
+    an increasing 5 digit index, and the oldest files are removed
+    when there are more than ``maxFiles`` files.
+
+    Example usage:
+
+    .. code-block:: python
+
+        ib = IB()
+        ib.client.conn.recorder = Recorder('session.cap')
+        ib.connect('127.0.0.1', 7497, clientId=1)
+
+    The recorder can also be used as a context manager that closes
+    the current capture file on exit.
+
+    Args:
+        path: Base path of the capture files.
+        maxFileSize: Maximum size of a capture file in bytes;
+            0 is unlimited.
+        maxFiles: Maximum number of capture files to keep; 0 is unlimited.
+    """
+
+    def __init__(self, path: str, maxFileSize: int = 256 << 20, maxFiles: int = 0):
+        self.path = path
+        self.maxFileSize = maxFileSize
+        self.maxFiles = maxFiles
+        self._file: BinaryIO | None = None
+        self._fileSize = 0
+        existing = Replayer.files(path)
+        self._index = int(existing[-1].rsplit(".", 1)[-1]) + 1 if existing else 0
+        self._logger = logging.getLogger("ib_async.recorder")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def record(self, data, t: float = 0, outgoing: bool = False):
+        """
+        Record the given bytes, received at time ``t`` (default now),
+        or sent when ``outgoing`` is set.
+        """
+        if not self._file or self.maxFileSize and self._fileSize > self.maxFileSize:
+            self.rotate()
+        assert self._file
+        size = len(data) | OUTGOING if outgoing else len(data)
+        self._file.write(_header.pack(t or time.time(), size))
+        self._file.write(data)
+        self._fileSize += _header.size + len(data)
+
+    def rotate(self):
+        """Continue recording in a new file."""
+        self.close()
+        filename = f"{self.path}.{self._index:05d}"
+        self._index += 1
+        # the file stays open across records until the next rotate or close
+        self._file = open(filename, "wb")  # noqa: SIM115
+        self._file.write(MAGIC)
+        self._fileSize = len(MAGIC)
+        self._logger.info(f"Recording to {filename}")
+        if self.maxFiles:
+            for old in Replayer.files(self.path)[: -self.maxFiles]:
+                os.remove(old)
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class Replayer:
+    """
+    Replay capture files made with :class:`.Recorder` through a client,
+    so that the data goes through the same framing, decoding and wrapper
+    code as live data.
+
+    Replaying starts with a fresh client state and includes the
+    handshake, so the capture should have been recorded from the
+    start of a connection. The recorded outgoing market data, market
+    depth and tick-by-tick requests and their cancellations are
+    replayed into the wrapper, so that the incoming ticks find their
+    tickers under the recorded request ids.
+
+    Example usage:
+
+    .. code-block:: python
+
+        ib = IB()
+        replayer = Replayer('session.cap')
+        ib.run(replayer.replay(ib.client))
+
+    Args:
+        path: The capture file, or the base path of a series of
+            capture files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tickTypes: dict[int, str] = {}
+        self._logger = logging.getLogger("ib_async.replayer")
+
+    @staticmethod
+    def files(path: str) -> list[str]:
+        """Get the capture files of the given base path, in order."""
+        if os.path.isfile(path):
+            return [path]
+        return sorted(glob.glob(glob.escape(path) + ".[0-9][0-9][0-9][0-9][0-9]"))
+
+    def records(self) -> Iterator[tuple[float, bool, bytes]]:
+        """
+        Iterate over the (time, outgoing, data) records of all
+        capture files.
+        """
+        for filename in self.files(self.path):
+            with open(filename, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{filename} is not a capture file")
+                while header := f.read(_header.size):
+                    t, size = _header.unpack(header)
+                    outgoing = bool(size & OUTGOING)
+                    yield t, outgoing, f.read(size & ~OUTGOING)
+
+    async def replay(
+        self, client: Client, speed: float = 0, yieldEvery: int = 1000
+    ) -> int:
+        """
+        Feed the recorded data into the given client and return the
+        number of replayed incoming records.
+
+        Args:
+            client: Client to replay into; It must not have a live
+                connection.
+            speed: Replay at ``speed`` times the original pace,
+                or as fast as possible when 0.
+            yieldEvery: When replaying as fast as possible, let the
+                event loop run after this many records.
+        """
+        if client.conn.isConnected():
+            raise ConnectionError("Can't replay into a live connection")
+        client.reset()
+        client.conn.reset()
+        self._tickTypes.clear()
+        feed = client.conn.feed
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        t0 = 0.0
+        n = 0
+        for t, outgoing, data in self.records():
+            if outgoing:
+                self._replayRequest(client, data)
+                continue
+            if speed:
+                t0 = t0 or t
+                delay = start + (t - t0) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif n % yieldEvery == 0:
+                await asyncio.sleep(0)
+            feed(data)
+            n += 1
+        return n
+
+    def _replayRequest(self, client: Client, msg: bytes):
+        """Restore the ticker of a recorded outgoing request."""
+        fields = msg[4:-1].decode(errors="backslashreplace").split("\0")
+        msgId = fields[0]
+        wrapper = client.wrapper
+        if msgId in ("2", "11", "98"):
+            # cancelMktData, cancelMktDepth, cancelTickByTickData
+            reqId = int(fields[1 if msgId == "98" else 2])
+            ticker = wrapper.reqId2Ticker.get(reqId)
+            tickType = self._tickTypes.pop(reqId, None)
+            if ticker and tickType:
+                wrapper.endTicker(ticker, tickType)
+            return
+        elif msgId == "1":
+            # reqMktData
+            reqId = int(fields[2])
+            contract = _parseContract(fields, 3)
+            i = 15
+            if contract.secType == "BAG":
+                numLegs = int(fields[i])
+                contract.comboLegs = [
+                    ComboLeg(int(conId), int(ratio), action, exchange)
+                    for conId, ratio, action, exchange in zip(
+                        *[iter(fields[i + 1 : i + 1 + 4 * numLegs])] * 4
+                    )
+                ]
+                i += 1 + 4 * numLegs
+            # skip the delta neutral contract and the generic tick list
+            i += 5 if fields[i] == "1" else 2
+            tickType = "snapshot" if fields[i] == "1" else "mktData"
+        elif msgId == "10":
+            # reqMktDepth
+            reqId = int(fields[2])
+            contract = _parseContract(fields, 3)
+            tickType = "mktDepth"
+        elif msgId == "97":
+            # reqTickByTickData
+            reqId = int(fields[1])
+            contract = _parseContract(fields, 2)
+            tickType = fields[14]
+        else:
+            return
+        wrapper.startTicker(reqId, contract, tickType)
+        self._tickTypes[reqId] = tickType
+        self._logger.debug(f"Replaying {tickType} request {reqId} for {contract}")
+
+
+def _parseContract(fields: list[str], i: int) -> Contract:
+    """Parse the standard contract block that starts at index ``i``."""
+    (
+        conId,
+        symbol,
+        secType,
+        lastTradeDateOrContractMonth,
+        strike,
+        right,
+        multiplier,
+        exchange,
+        primaryExchange,
+        currency,
+        localSymbol,
+        tradingClass,
+    ) = fields[i : i + 12]
+    return Contract.create(
+        conId=int(conId or 0),
+        symbol=symbol,
+        secType=secType,
+        lastTradeDateOrContractMonth=lastTradeDateOrContractMonth,
+        strike=float(strike or 0),
+        right=right,
+        multiplier=multiplier,
+        exchange=exchange,
+        primaryExchange=primaryExchange,
+        currency=currency,
+        localSymbol=localSymbol,
+        tradingClass=tradingClass,
+    )
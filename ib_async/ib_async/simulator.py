@@ -0,0 +1,605 @@
+"""Local stand-in for TWS/gateway that speaks the IB socket protocol."""
+
+import asyncio
+import datetime as dt
+import itertools
+import logging
+import random
+import struct
+from collections.abc import Callable
+
+from eventkit import Event
+
+from .contract import Contract
+from .util import ZoneInfo
+
+_utc = ZoneInfo("UTC")
+_packLength = struct.Struct(">I").pack
+_unpackLength = struct.Struct(">I").unpack
+
+_durationSecs = {"S": 1, "D": 86400, "W": 7 * 86400, "M": 30 * 86400, "Y": 365 * 86400}
+
+_barSizeSecs = {
+    "sec": 1,
+    "secs": 1,
+    "min": 60,
+    "mins": 60,
+    "hour": 3600,
+    "hours": 3600,
+    "day": 86400,
+    "days": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+}
+
+
+def frame(*fields) -> bytes:
+    """Encode the given fields into a length-prefixed message."""
+    msg = "".join(f"{f}\0" for f in fields).encode()
+    return _packLength(len(msg)) + msg
+
+
+class SimulatorSession:
+    """
+    A client connection to the :class:`.Simulator`.
+
+    Args:
+        simulator: The simulator that accepted the connection.
+        reader: Stream to read requests from.
+        writer: Stream to write responses to.
+    """
+
+    def __init__(
+        self,
+        simulator: "Simulator",
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        self.simulator = simulator
+        self.reader = reader
+        self.writer = writer
+        self.serverVersion = 0
+        self.clientId = -1
+        # reqId -> contract of the market data subscriptions
+        self.mktData: dict[int, Contract] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def send(self, *fields):
+        """Send a message with the given fields."""
+        self.writer.write(frame(*fields))
+
+    def sendRaw(self, data: bytes):
+        """Send already encoded messages."""
+        self.writer.write(data)
+
+    async def drain(self):
+        await self.writer.drain()
+
+    def schedule(self, coro):
+        """Run a coroutine for as long as the session lasts."""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        self.writer.close()
+
+    async def run(self):
+        try:
+            await self._handshake()
+            while True:
+                header = await self.reader.readexactly(4)
+                msg = await self.reader.readexactly(_unpackLength(header)[0])
+                fields = msg.decode(errors="backslashreplace").split("\0")
+                fields.pop()
+                self.simulator.requestEvent.emit(self, fields)
+                handler = self.simulator.handlers.get(int(fields[0]))
+                if handler:
+                    handler(self, fields)
+                else:
+                    self.simulator._logger.debug(f"Unhandled request {fields}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.close()
+            self.simulator.sessions.discard(self)
+
+    async def _handshake(self):
+        prefix = await self.reader.readexactly(4)
+        if prefix != b"API\0":
+            raise ConnectionError(f"Invalid handshake {prefix!r}")
+        header = await self.reader.readexactly(4)
+        versions = await self.reader.readexactly(_unpackLength(header)[0])
+        minVersion, maxVersion = versions[1:].split(b" ")[0].split(b"..")
+        self.serverVersion = max(
+            int(minVersion), min(int(maxVersion), self.simulator.ServerVersion)
+        )
+        now = dt.datetime.now(_utc)
+        self.send(self.serverVersion, now.strftime("%Y%m%d %H:%M:%S UTC"))
+
+
+class Simulator:
+    """
+    Local stand-in for TWS or IB gateway for testing and benchmarking
+    without a live connection.
+
+    The simulator is an asyncio server that speaks the framed socket
+    protocol. It does the handshake, sends nextValidId and managedAccounts
+    when the API is started and answers common requests with generated
+    data:
+
+    * Positions, open orders, completed orders, account updates,
+      account summary and executions requests are answered
+      with the configured positions and executions and the
+      corresponding end messages;
+    * Contract details requests echo the contract with a conId;
+    * Market data requests get a stream of bid, ask and last
+      ticks every ``TickInterval`` seconds;
+    * Historical data requests get random walk bars;
+    * Placed orders are acknowledged and, for ``FillOrders``, filled
+      after ``FillDelay`` seconds with orderStatus, execDetails and
+      commissionReport messages.
+
+    Any request can be handled differently by setting a handler
+    ``(session: SimulatorSession, fields: list[str])`` in
+    :attr:`handlers`, keyed by the message id of the request.
+
+    Example usage:
+
+    .. code-block:: python
+
+        sim = Simulator()
+        port = await sim.start()
+        ib = IB()
+        await ib.connectAsync('127.0.0.1', port, clientId=1)
+
+    Args:
+        host: Host name or IP address to listen on.
+        port: Port number to listen on; Use 0 for any free port.
+        accounts: Names of the managed accounts.
+
+    Parameters:
+      ServerVersion (int):
+        Highest server version to negotiate.
+      TickInterval (float):
+        Time (in seconds) between the ticks of a market data stream.
+        Set to 0 to not stream ticks.
+      FillOrders (bool):
+        Fill every placed order; Otherwise orders stay submitted.
+      FillDelay (float):
+        Time (in seconds) between submitting and filling an order.
+      MaxBars (int):
+        Maximum number of bars for a historical data request.
+
+    Events:
+      * ``requestEvent`` (session: :class:`.SimulatorSession`,
+        fields: list[str]): Emits every incoming request.
+    """
+
+    events = ("requestEvent",)
+
+    ServerVersion = 176
+    TickInterval = 0.1
+    FillOrders = True
+    FillDelay = 0.01
+    MaxBars = 10000
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        accounts: tuple[str, ...] = ("DU123456",),
+    ):
+        self.host = host
+        self.port = port
+        self.accounts = list(accounts)
+        self.sessions: set[SimulatorSession] = set()
+        # account -> list of (contract, position, avgCost)
+        self.positions: dict[str, list[tuple[Contract, float, float]]] = {}
+        # list of execDetails fields, replayed for reqExecutions
+        self.executions: list[list] = []
+        self.requestEvent = Event("requestEvent")
+        self.handlers: dict[int, Callable[[SimulatorSession, list[str]], None]] = {
+            1: self.reqMktData,
+            2: self.cancelMktData,
+            3: self.placeOrder,
+            4: self.cancelOrder,
+            5: self.reqOpenOrders,
+            6: self.reqAccountUpdates,
+            7: self.reqExecutions,
+            9: self.reqContractDetails,
+            16: self.reqOpenOrders,
+            20: self.reqHistoricalData,
+            49: self.reqCurrentTime,
+            61: self.reqPositions,
+            62: self.reqAccountSummary,
+            71: self.startApi,
+            76: self.reqAccountUpdatesMulti,
+            99: self.reqCompletedOrders,
+        }
+        self._server: asyncio.AbstractServer | None = None
+        self._prices: dict[int, float] = {}
+        self._conIds: dict[tuple, int] = {}
+        self._orderIds = itertools.count(1)
+        self._permIds = itertools.count(1000000)
+        self._execIds = itertools.count(1)
+        self._logger = logging.getLogger("ib_async.simulator")
+
+    async def start(self) -> int:
+        """Start listening and return the port number."""
+        self._server = await asyncio.start_server(self._onConnect, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._logger.info(f"Simulator listening on {self.host}:{self.port}")
+        return self.port
+
+    async def stop(self):
+        """Close all sessions and stop listening."""
+        for session in list(self.sessions):
+            session.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def floodTicks(self, count: int, batchSize: int = 1000):
+        """
+        Send ``count`` tickPrice messages, spread over all market data
+        subscriptions, to every session as fast as the sockets allow.
+        """
+        for session in list(self.sessions):
+            reqIds = list(session.mktData)
+            if not reqIds:
+                continue
+            batch = b"".join(
+                frame(1, 6, reqIds[i % len(reqIds)], 4, 100 + i % 100 / 100, 1, 0)
+                for i in range(batchSize)
+            )
+            for _ in range(count // batchSize):
+                session.sendRaw(batch)
+                await session.drain()
+            rest = count % batchSize
+            if rest:
+                session.sendRaw(batch[: self._batchLength(batch, rest)])
+                await session.drain()
+
+    def conId(self, contract: Contract) -> int:
+        """Get the (simulated) conId of the given contract."""
+        if contract.conId:
+            return contract.conId
+        key = (
+            contract.symbol,
+            contract.secType,
+            contract.lastTradeDateOrContractMonth,
+            contract.strike,
+            contract.right,
+            contract.currency,
+        )
+        return self._conIds.setdefault(key, 100000 + len(self._conIds))
+
+    def price(self, contract: Contract) -> float:
+        """Get the current (random walk) price of the given contract."""
+        conId = self.conId(contract)
+        price = self._prices.get(conId) or 100.0
+        price = round(max(0.01, price + random.choice((-0.01, 0.0, 0.01))), 2)
+        self._prices[conId] = price
+        return price
+
+    # request handlers
+
+    def startApi(self, session: SimulatorSession, fields):
+        _, _, clientId, *_ = fields
+        session.clientId = int(clientId)
+        session.send(9, 1, next(self._orderIds))
+        session.send(15, 1, ",".join(self.accounts))
+
+    def reqCurrentTime(self, session: SimulatorSession, fields):
+        session.send(49, 1, int(dt.datetime.now(_utc).timestamp()))
+
+    def reqPositions(self, session: SimulatorSession, fields):
+        for account, positions in self.positions.items():
+            for c, position, avgCost in positions:
+                session.send(
+                    61,
+                    3,
+                    account,
+                    self.conId(c),
+                    c.symbol,
+                    c.secType,
+                    c.lastTradeDateOrContractMonth,
+                    c.strike,
+                    c.right,
+                    c.multiplier,
+                    c.exchange,
+                    c.currency,
+                    c.localSymbol,
+                    c.tradingClass,
+                    position,
+                    avgCost,
+                )
+        session.send(62, 1)
+
+    def reqOpenOrders(self, session: SimulatorSession, fields):
+        session.send(53, 1)
+
+    def reqCompletedOrders(self, session: SimulatorSession, fields):
+        session.send(102)
+
+    def reqAccountUpdates(self, session: SimulatorSession, fields):
+        _, _, subscribe, account = fields
+        if subscribe == "1":
+            now = dt.datetime.now()
+            session.send(6, 2, "NetLiquidation", "1000000", "USD", account)
+            session.send(8, 1, now.strftime("%H:%M"))
+            session.send(54, 1, account)
+
+    def reqAccountUpdatesMulti(self, session: SimulatorSession, fields):
+        _, _, reqId, account, modelCode, *_ = fields
+        session.send(
+            73, 1, reqId, account, modelCode, "NetLiquidation", "1000000", "USD"
+        )
+        session.send(74, 1, reqId)
+
+    def reqAccountSummary(self, session: SimulatorSession, fields):
+        _, _, reqId, *_ = fields
+        for account in self.accounts:
+            session.send(63, 1, reqId, account, "NetLiquidation", "1000000", "USD")
+        session.send(64, 1, reqId)
+
+    def reqExecutions(self, session: SimulatorSession, fields):
+        _, _, reqId, *_ = fields
+        for execFields in self.executions:
+            session.send(11, reqId, *execFields)
+        session.send(55, 1, reqId)
+
+    def reqContractDetails(self, session: SimulatorSession, fields):
+        _, _, reqId, *fields = fields
+        c = self._parseContract(fields)
+        session.send(
+            10,
+            reqId,
+            c.symbol,
+            c.secType,
+            c.lastTradeDateOrContractMonth,
+            c.strike,
+            c.right,
+            c.exchange,
+            c.currency,
+            c.localSymbol or c.symbol,
+            c.symbol,
+            c.tradingClass or c.symbol,
+            self.conId(c),
+            0.01,
+            c.multiplier,
+            "LMT,MKT",
+            c.exchange,
+            1,
+            0,
+            c.symbol,
+            c.primaryExchange,
+            "",
+            "",
+            "",
+            "",
+            "UTC",
+            "",
+            "",
+            "",
+            "",
+            0,
+            1,
+            "",
+            "",
+            "26",
+            "",
+            "COMMON",
+            1,
+            1,
+            1,
+        )
+        session.send(52, 1, reqId)
+
+    def reqMktData(self, session: SimulatorSession, fields):
+        _, _, reqId, *fields = fields
+        reqId = int(reqId)
+        c = self._parseContract(fields)
+        snapshot = fields[-3] == "1"
+        self._sendQuote(session, reqId, c)
+        if snapshot:
+            session.send(57, 1, reqId)
+        else:
+            session.mktData[reqId] = c
+            if self.TickInterval:
+                session.schedule(self._streamTicks(session, reqId, c))
+
+    def cancelMktData(self, session: SimulatorSession, fields):
+        _, _, reqId = fields
+        session.mktData.pop(int(reqId), None)
+
+    def reqHistoricalData(self, session: SimulatorSession, fields):
+        _, reqId, *fields = fields
+        c = self._parseContract(fields)
+        (
+            _includeExpired,
+            _endDateTime,
+            barSize,
+            duration,
+            _useRTH,
+            _whatToShow,
+            formatDate,
+            *_,
+        ) = fields[12:]
+        num, unit = duration.split()
+        n, size = barSize.split()
+        step = int(n) * _barSizeSecs[size]
+        numBars = max(1, min(self.MaxBars, int(num) * _durationSecs[unit] // step))
+        end = dt.datetime.now(_utc).replace(microsecond=0)
+        start = end - dt.timedelta(seconds=numBars * step)
+        price = self.price(c)
+        bars = []
+        for i in range(numBars):
+            t = start + dt.timedelta(seconds=i * step)
+            if step >= 86400:
+                date = t.strftime("%Y%m%d")
+            elif formatDate == "2":
+                date = str(int(t.timestamp()))
+            else:
+                date = t.strftime("%Y%m%d %H:%M:%S")
+            o = price
+            price = round(max(0.01, price * (1 + random.gauss(0, 0.002))), 2)
+            hi = max(o, price) + 0.01
+            lo = max(0.01, min(o, price) - 0.01)
+            bars += [date, o, hi, lo, price, 100, round((o + price) / 2, 4), 10]
+        session.send(
+            17,
+            reqId,
+            start.strftime("%Y%m%d %H:%M:%S"),
+            end.strftime("%Y%m%d %H:%M:%S"),
+            numBars,
+            *bars,
+        )
+
+    def placeOrder(self, session: SimulatorSession, fields):
+        _, orderId, *fields = fields
+        orderId = int(orderId)
+        c = self._parseContract(fields)
+        _secIdType, _secId, action, qty, orderType, lmtPrice, *_ = fields[12:]
+        qty = float(qty)
+        permId = next(self._permIds)
+        self._sendOrderStatus(session, orderId, "Submitted", 0, qty, 0, permId)
+        if self.FillOrders:
+            price = float(lmtPrice) if orderType == "LMT" and lmtPrice else None
+            session.schedule(
+                self._fill(session, orderId, permId, c, action, qty, price)
+            )
+
+    def cancelOrder(self, session: SimulatorSession, fields):
+        _, _, orderId, *_ = fields
+        self._sendOrderStatus(session, int(orderId), "Cancelled", 0, 0, 0, 0)
+
+    # helpers
+
+    @staticmethod
+    def _parseContract(fields) -> Contract:
+        c = Contract()
+        (
+            conId,
+            c.symbol,
+            c.secType,
+            c.lastTradeDateOrContractMonth,
+            strike,
+            c.right,
+            c.multiplier,
+            c.exchange,
+            c.primaryExchange,
+            c.currency,
+            c.localSymbol,
+            c.tradingClass,
+        ) = fields[:12]
+        c.conId = int(conId or 0)
+        c.strike = float(strike or 0)
+        return c
+
+    @staticmethod
+    def _batchLength(batch: bytes, count: int) -> int:
+        # byte length of the first count messages of the batch
+        pos = 0
+        for _ in range(count):
+            pos += 4 + _unpackLength(batch[pos : pos + 4])[0]
+        return pos
+
+    def _sendQuote(self, session: SimulatorSession, reqId: int, c: Contract):
+        price = self.price(c)
+        session.send(1, 6, reqId, 1, round(price - 0.01, 2), 100, 0)
+        session.send(1, 6, reqId, 2, round(price + 0.01, 2), 100, 0)
+        session.send(1, 6, reqId, 4, price, 1, 0)
+
+    async def _streamTicks(self, session: SimulatorSession, reqId: int, c: Contract):
+        while reqId in session.mktData:
+            await asyncio.sleep(self.TickInterval)
+            if reqId in session.mktData:
+                self._sendQuote(session, reqId, c)
+
+    def _sendOrderStatus(
+        self,
+        session: SimulatorSession,
+        orderId: int,
+        status: str,
+        filled: float,
+        remaining: float,
+        avgFillPrice: float,
+        permId: int,
+    ):
+        session.send(
+            3,
+            orderId,
+            status,
+            filled,
+            remaining,
+            avgFillPrice,
+            permId,
+            0,
+            avgFillPrice,
+            session.clientId,
+            "",
+            0,
+        )
+
+    async def _fill(
+        self,
+        session: SimulatorSession,
+        orderId: int,
+        permId: int,
+        c: Contract,
+        action: str,
+        qty: float,
+        price: float | None,
+    ):
+        await asyncio.sleep(self.FillDelay)
+        price = price or self.price(c)
+        execId = f"0000e0d5.{next(self._execIds):08x}.01.01"
+        now = dt.datetime.now(_utc).strftime("%Y%m%d %H:%M:%S UTC")
+        execFields = [
+            orderId,
+            self.conId(c),
+            c.symbol,
+            c.secType,
+            c.lastTradeDateOrContractMonth,
+            c.strike,
+            c.right,
+            c.multiplier,
+            c.exchange,
+            c.currency,
+            c.localSymbol,
+            c.tradingClass,
+            execId,
+            now,
+            self.accounts[0],
+            c.exchange,
+            "BOT" if action == "BUY" else "SLD",
+            qty,
+            price,
+            permId,
+            session.clientId,
+            0,
+            qty,
+            price,
+            "",
+            "",
+            "",
+            "",
+            1,
+        ]
+        if session.serverVersion >= 178:
+            execFields.append(0)
+        self.executions.append(execFields)
+        self._sendOrderStatus(session, orderId, "Filled", qty, 0, price, permId)
+        session.send(11, -1, *execFields)
+        session.send(59, 1, execId, 1.0, c.currency, 0.0, "", "")
+
+    async def _onConnect(self, reader, writer):
+        session = SimulatorSession(self, reader, writer)
+        self.sessions.add(session)
+        await session.run()
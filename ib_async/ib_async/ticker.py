@@ -1,9 +1,11 @@
 """Access to realtime market information."""
 
-from dataclasses import dataclass, field
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import ClassVar, Optional, Union
+from typing import ClassVar, Optional, Union, overload
 
+import numpy as np
 from eventkit import Event, Op
 
 from ib_async.contract import Contract
@@ -24,8 +26,173 @@ from ib_async.util import dataclassRepr, isNan
 nan = float("nan")
 
 
-@dataclass
-class Ticker:
+class BookSide(Sequence[DOMLevel]):
+    """
+    One side of an order book, with the prices and sizes of the levels in
+    preallocated NumPy arrays. Positions follow the market depth protocol:
+    an insert shifts the levels at and after its position one down and
+    a delete shifts them one up.
+
+    It is a read-only sequence of :class:`.DOMLevel`, which are made
+    on access only. Unlike the lists that the order book used to be,
+    it is not a ``list`` and has no ``append`` or item assignment;
+    It is changed only through :meth:`insert`, :meth:`update`,
+    :meth:`delete` and :meth:`clear`. Use :meth:`copy` or ``list()``
+    to get a snapshot as a list.
+
+    Args:
+        capacity: Initial number of levels to allocate room for, the
+            arrays are grown when needed.
+    """
+
+    __slots__ = ("_capacity", "_marketMaker", "_n", "_price", "_size")
+
+    def __init__(self, capacity: int = 10):
+        self._n = 0
+        self._capacity = max(capacity, 1)
+        self._price = np.zeros(self._capacity, "f8")
+        self._size = np.zeros(self._capacity, "f8")
+        self._marketMaker: list[str] = []
+
+    def __len__(self) -> int:
+        return self._n
+
+    @overload
+    def __getitem__(self, i: int) -> DOMLevel: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[DOMLevel]: ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("book level out of range")
+        return DOMLevel(
+            float(self._price[i]), float(self._size[i]), self._marketMaker[i]
+        )
+
+    def __iter__(self) -> Iterator[DOMLevel]:
+        for i in range(self._n):
+            yield DOMLevel(
+                float(self._price[i]), float(self._size[i]), self._marketMaker[i]
+            )
+
+    def __eq__(self, other):
+        if isinstance(other, (BookSide, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def _grow(self, n: int):
+        capacity = max(n, 2 * self._capacity)
+        price = np.zeros(capacity, "f8")
+        size = np.zeros(capacity, "f8")
+        price[: self._n] = self._price[: self._n]
+        size[: self._n] = self._size[: self._n]
+        self._price = price
+        self._size = size
+        self._capacity = capacity
+
+    def insert(self, position: int, price: float, size: float, marketMaker: str = ""):
+        """Insert a level, shifting the levels at and after it down."""
+        n = self._n
+        if n == self._capacity:
+            self._grow(n + 1)
+        position = min(position, n)
+        if position < n:
+            self._price[position + 1 : n + 1] = self._price[position:n]
+            self._size[position + 1 : n + 1] = self._size[position:n]
+        self._price[position] = price
+        self._size[position] = size
+        self._marketMaker.insert(position, marketMaker)
+        self._n = n + 1
+
+    def update(self, position: int, price: float, size: float, marketMaker: str = ""):
+        """Update a level in place, a position past the end is inserted."""
+        if position >= self._n:
+            self.insert(position, price, size, marketMaker)
+        else:
+            self._price[position] = price
+            self._size[position] = size
+            self._marketMaker[position] = marketMaker
+
+    def delete(self, position: int) -> float | None:
+        """
+        Delete a level, shifting the levels after it up. Return the price
+        of the deleted level, or None if there's no level at the position.
+        """
+        n = self._n
+        if not 0 <= position < n:
+            return None
+        price = float(self._price[position])
+        self._price[position : n - 1] = self._price[position + 1 : n]
+        self._size[position : n - 1] = self._size[position + 1 : n]
+        del self._marketMaker[position]
+        self._n = n - 1
+        return price
+
+    def clear(self):
+        """Remove all levels."""
+        self._n = 0
+        self._marketMaker.clear()
+
+    def copy(self) -> list[DOMLevel]:
+        """Snapshot of the levels as a list."""
+        return list(self)
+
+    def prices(self):
+        """NumPy array with the level prices, best first."""
+        return self._price[: self._n].copy()
+
+    def sizes(self):
+        """NumPy array with the level sizes, best first."""
+        return self._size[: self._n].copy()
+
+    def totalSize(self, levels: int = 0) -> float:
+        """Total size of the best ``levels`` levels (0 for all levels)."""
+        n = min(levels, self._n) if levels else self._n
+        return float(self._size[:n].sum()) if n else 0.0
+
+    def cumulativeSizes(self):
+        """NumPy array with the cumulative size up to each level."""
+        return np.cumsum(self._size[: self._n])
+
+    def vwap(self, size: float) -> float:
+        """
+        Volume-weighted average price to fill the given size by walking
+        the levels, or nan if the book is not deep enough.
+        """
+        n = self._n
+        if not n or size <= 0:
+            return nan
+        sizes = self._size[:n]
+        cum = np.cumsum(sizes)
+        if cum[-1] < size:
+            return nan
+        i = int(np.searchsorted(cum, size))
+        filled = np.array(sizes[: i + 1])
+        filled[i] -= cum[i] - size
+        return float(np.dot(filled, self._price[: i + 1]) / size)
+
+
+class _TickerSlots:
+    # the slots of the Ticker attributes that are not fields, they are
+    # set here since type checkers only see the field slots of Ticker
+    __slots__ = ("__weakref__", "updateEvent")
+
+    updateEvent: "TickerUpdateEvent"
+
+    def _initSlots(self):
+        self.updateEvent = TickerUpdateEvent("updateEvent")
+
+
+@dataclass(slots=True)
+class Ticker(_TickerSlots):
     """
     Current market data such as bid, ask, last price, etc. for a contract.
 
@@ -33,16 +200,26 @@ class Ticker:
     the ``ticks`` list.
 
     Streaming level-2 ticks of type :class:`.MktDepthData` are stored in the
-    ``domTicks`` list. The order book (DOM) is available as lists of
-    :class:`.DOMLevel` in ``domBids`` and ``domAsks``.
+    ``domTicks`` list. The order book (DOM) is available as sequences of
+    :class:`.DOMLevel` in ``domBids`` and ``domAsks``, see
+    :class:`.BookSide` for the depth queries on them.
 
     Streaming tick-by-tick ticks are stored in ``tickByTicks``.
 
+    The ``ticks``, ``tickByTicks`` and ``domTicks`` lists only hold the
+    ticks of the latest update. To keep the last N level-1 ticks across
+    updates, set ``history`` to a :class:`.TickHistory`.
+
     For options the :class:`.OptionComputation` values for the bid, ask, resp.
     last price are stored in the ``bidGreeks``, ``askGreeks`` resp.
     ``lastGreeks`` attributes. There is also ``modelGreeks`` that conveys
     the greeks as calculated by Interactive Brokers' option model.
 
+    To keep large universes of tickers small, a ticker uses slots
+    instead of an instance dict and the order book sides are only made
+    on first access. Because of the slots, setting an attribute
+    that is not a field of the ticker raises an ``AttributeError``.
+
     Events:
         * ``updateEvent`` (ticker: :class:`.Ticker`)
     """
@@ -115,10 +292,9 @@ class Ticker:
     tickByTicks: list[
         Union[TickByTickAllLast, TickByTickBidAsk, TickByTickMidPoint]
     ] = field(default_factory=list)
-    domBids: list[DOMLevel] = field(default_factory=list)
-    domBidsDict: dict[int, DOMLevel] = field(default_factory=dict)
-    domAsks: list[DOMLevel] = field(default_factory=list)
-    domAsksDict: dict[int, DOMLevel] = field(default_factory=dict)
+    # made on first access by __getattr__
+    domBids: BookSide = field(init=False, metadata={"lazy": BookSide})
+    domAsks: BookSide = field(init=False, metadata={"lazy": BookSide})
     domTicks: list[MktDepthData] = field(default_factory=list)
     bidGreeks: Optional[OptionComputation] = None
     askGreeks: Optional[OptionComputation] = None
@@ -130,6 +306,7 @@ class Ticker:
     regulatoryImbalance: float = nan
     bboExchange: str = ""
     snapshotPermissions: int = 0
+    history: Optional["TickHistory"] = None
 
     defaults: IBDefaults = field(default_factory=IBDefaults, repr=False)
     created: bool = False
@@ -139,7 +316,7 @@ class Ticker:
         # want to make sure if this was _already_ created, we don't overwrite
         # everything with _another_ post_init clear.
         if not self.created:
-            self.updateEvent = TickerUpdateEvent("updateEvent")
+            self._initSlots()
             self.minTick = self.defaults.unset
             self.bid = self.defaults.unset
             self.bidSize = self.defaults.unset
@@ -198,21 +375,60 @@ class Ticker:
 
             self.created = True
 
-    def __eq__(self, other):
-        return self is other
-
-    def __hash__(self):
-        return id(self)
+    # identity based, using the C slots of object to keep the
+    # pendingTickers set updates fast
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
 
     __repr__ = dataclassRepr
     __str__ = dataclassRepr
 
+    def __getattr__(self, name):
+        # only called for an empty slot, or an unknown name
+        factory = _lazyFields.get(name)
+        if factory is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        value = factory()
+        setattr(self, name, value)
+        return value
+
+    def clearTicks(self):
+        """
+        Clear the ``ticks``, ``tickByTicks`` and ``domTicks`` lists,
+        keeping the lists for reuse.
+        """
+        self.ticks.clear()
+        self.tickByTicks.clear()
+        self.domTicks.clear()
+
     def isUnset(self, value) -> bool:
         # if default value is nan and value is nan, it is unset.
         # else, if value matches default value, it is unset.
         dev = self.defaults.unset
         return (dev != dev and value != value) or (value == dev)
 
+    @property
+    def domBidsDict(self) -> dict[int, DOMLevel]:
+        """The bid levels of the order book by position."""
+        return dict(enumerate(self.domBids))
+
+    @property
+    def domAsksDict(self) -> dict[int, DOMLevel]:
+        """The ask levels of the order book by position."""
+        return dict(enumerate(self.domAsks))
+
+    def domImbalance(self, levels: int = 0) -> float:
+        """
+        Order book imbalance over the best ``levels`` levels (0 for all),
+        from -1 (all asks) to 1 (all bids), or nan for an empty book.
+        """
+        bidSize = self.domBids.totalSize(levels)
+        askSize = self.domAsks.totalSize(levels)
+        total = bidSize + askSize
+        return (bidSize - askSize) / total if total else nan
+
     def hasBidAsk(self) -> bool:
         """See if this ticker has a valid bid and ask."""
         return (
@@ -249,6 +465,82 @@ class Ticker:
         return price
 
 
+_lazyFields = {
+    f.name: f.metadata["lazy"] for f in fields(Ticker) if "lazy" in f.metadata
+}
+
+
+class TickHistory:
+    """
+    Ring buffer with the last ``capacity`` level-1 ticks of a ticker,
+    kept across updates in preallocated NumPy arrays. Adding a tick
+    allocates nothing.
+
+    Every tick gets a sequence number, counting up from 0. The ``seq``
+    attribute is the sequence number of the next tick, so the ticks
+    that came in since a previous read are ``since(prevSeq)``.
+
+    Args:
+        capacity: Maximum number of ticks to keep.
+    """
+
+    __slots__ = ("_price", "_size", "_tickType", "_time", "capacity", "seq")
+
+    fields: ClassVar = (
+        ("time", "f8"),
+        ("tickType", "i2"),
+        ("price", "f8"),
+        ("size", "f8"),
+    )
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self.capacity = capacity
+        self.seq = 0
+        self._time = np.zeros(capacity, "f8")
+        self._tickType = np.zeros(capacity, "i2")
+        self._price = np.zeros(capacity, "f8")
+        self._size = np.zeros(capacity, "f8")
+
+    def __repr__(self):
+        return f"TickHistory(capacity={self.capacity}, seq={self.seq})"
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    @property
+    def firstSeq(self) -> int:
+        """Sequence number of the oldest tick that is kept."""
+        return max(0, self.seq - self.capacity)
+
+    def append(self, time: float, tickType: int, price: float, size: float):
+        """Add a tick with the given epoch time."""
+        i = self.seq % self.capacity
+        self._time[i] = time
+        self._tickType[i] = tickType
+        self._price[i] = price
+        self._size[i] = size
+        self.seq += 1
+
+    def since(self, seq: int = 0):
+        """
+        Get the ticks with sequence number ``seq`` and later, as a NumPy
+        structured array with time (epoch seconds), tickType, price and
+        size columns. Ticks that have been overwritten already are
+        missing, compare ``seq`` with :attr:`firstSeq` to detect this.
+        """
+        start = max(seq, self.firstSeq)
+        arr = np.empty(max(0, self.seq - start), dtype=list(self.fields))
+        if len(arr):
+            idx = np.arange(start, self.seq) % self.capacity
+            arr["time"] = self._time[idx]
+            arr["tickType"] = self._tickType[idx]
+            arr["price"] = self._price[idx]
+            arr["size"] = self._size[idx]
+        return arr
+
+
 class TickerUpdateEvent(Event):
     __slots__ = ()
 
@@ -0,0 +1,153 @@
+"""Columnar table with the latest market data of many tickers."""
+
+from typing import ClassVar
+
+from ib_async.ticker import Ticker
+
+nan = float("nan")
+
+
+class TickerTable:
+    """
+    The latest market data of tickers in preallocated NumPy columns,
+    with one row per ticker. A ticker gets its row on its first update
+    and keeps it, so a row id is stable for the lifetime of the table.
+
+    The :class:`.Wrapper` updates the rows of the updated tickers in place
+    after each network packet, before the ticker events are emitted.
+
+    Every name in ``columns`` is available as an attribute that gives the
+    column as a zero-copy NumPy array view, for example ``table.bid``.
+    The greeks columns are those of ``Ticker.modelGreeks``. Values that
+    are not available are nan or the ``unset`` value of the
+    :class:`.IBDefaults` used.
+
+    Args:
+        capacity: Initial number of rows to allocate room for, the
+            columns are grown when needed.
+    """
+
+    columns: ClassVar = (
+        "timestamp",
+        "bid",
+        "bidSize",
+        "ask",
+        "askSize",
+        "last",
+        "lastSize",
+        "volume",
+        "open",
+        "high",
+        "low",
+        "close",
+        "impliedVol",
+        "delta",
+        "gamma",
+        "vega",
+        "theta",
+        "undPrice",
+    )
+
+    _noGreeks: ClassVar = (nan,) * 6
+
+    def __init__(self, capacity: int = 1000):
+        import numpy as np
+
+        self.tickers: list[Ticker] = []
+        """ row id -> ticker """
+
+        self._rows: dict[Ticker, int] = {}
+        # column-major, so that the columns are contiguous
+        self._values = np.full((len(self.columns), max(capacity, 1)), nan)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __getattr__(self, name):
+        try:
+            i = self.__dict__["_index"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+        return self._values[i, : len(self.tickers)]
+
+    def __repr__(self):
+        return f"TickerTable(rows={len(self.tickers)})"
+
+    def row(self, ticker: Ticker) -> int:
+        """Get the row id of the ticker, giving it a new row if needed."""
+        row = self._rows.get(ticker)
+        if row is None:
+            row = self._rows[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            if row == self._values.shape[1]:
+                import numpy as np
+
+                values = np.full((len(self.columns), 2 * row), nan)
+                values[:, :row] = self._values
+                self._values = values
+        return row
+
+    def update(self, ticker: Ticker):
+        """Copy the latest values of the ticker into its row."""
+        row = self._rows.get(ticker)
+        if row is None:
+            row = self.row(ticker)
+        g = ticker.modelGreeks
+        self._values[:, row] = (
+            ticker.timestamp,
+            ticker.bid,
+            ticker.bidSize,
+            ticker.ask,
+            ticker.askSize,
+            ticker.last,
+            ticker.lastSize,
+            ticker.volume,
+            ticker.open,
+            ticker.high,
+            ticker.low,
+            ticker.close,
+            *(
+                (g.impliedVol, g.delta, g.gamma, g.vega, g.theta, g.undPrice)
+                if g
+                else self._noGreeks
+            ),
+        )
+
+    def midpoint(self):
+        """
+        Vectorized :meth:`.Ticker.midpoint`: the average of bid and ask
+        per row, or nan for rows without a valid bid and ask.
+        """
+        import numpy as np
+
+        return np.where(self._hasBidAsk(), (self.bid + self.ask) * 0.5, nan)
+
+    def marketPrice(self):
+        """
+        Vectorized :meth:`.Ticker.marketPrice`: per row the last price if
+        it is within the bid and ask or there is no valid bid and ask,
+        otherwise the midpoint.
+        """
+        import numpy as np
+
+        bid = self.bid
+        ask = self.ask
+        last = self.last
+        hasBidAsk = self._hasBidAsk()
+        inside = (bid <= last) & (last <= ask)
+        return np.where(hasBidAsk & ~inside, (bid + ask) * 0.5, last)
+
+    def _hasBidAsk(self):
+        import numpy as np
+
+        bid = self.bid
+        ask = self.ask
+        return (
+            (bid != -1)
+            & (ask != -1)
+            & ~np.isnan(bid)
+            & ~np.isnan(ask)
+            & (self.bidSize > 0)
+            & (self.askSize > 0)
+        )
@@ -5,6 +5,7 @@ import datetime as dt
 import functools
 import logging
 import math
+import operator
 import signal
 import sys
 import time
@@ -17,7 +18,9 @@ from typing import (
     Final,
     Iterator,
     List,
+    NamedTuple,
     Optional,
+    Sequence,
     TypeAlias,
     Union,
 )
@@ -58,7 +61,7 @@ def df(objs, labels: Optional[List[str]] = None):
         obj = objs[0]
         if is_dataclass(obj):
             df = pd.DataFrame.from_records(dataclassAsTuple(o) for o in objs)
-            df.columns = [field.name for field in fields(obj)]
+            df.columns = list(dataclassPlan(obj).names)
         elif isinstance(obj, DynamicObject):
             df = pd.DataFrame.from_records(o.__dict__ for o in objs)
         else:
@@ -79,15 +82,115 @@ def df(objs, labels: Optional[List[str]] = None):
     return df
 
 
+class DataclassPlan(NamedTuple):
+    """
+    Field plan of a dataclass type, made once per type by
+    :func:`dataclassPlan`.
+    """
+
+    names: tuple[str, ...]
+    """ field names in definition order """
+
+    defaults: tuple[Any, ...]
+    """ field defaults (``dataclasses.MISSING`` for factory defaults) """
+
+    getter: Callable[[Any], tuple[Any, ...]]
+    """
+    function to get the tuple of field values of an instance, with
+    a new empty value for a lazy field that has not been made yet
+    """
+
+    parsers: tuple[tuple[str, Any, Callable[[str], Any]], ...]
+    """ (name, default, converter) of the int, float and bool fields """
+
+    slotted: bool
+    """ whether any class of the type defines ``__slots__`` """
+
+
+_dataclassPlans: dict[type, DataclassPlan] = {}
+
+
+def _parseBool(s: str) -> bool:
+    return bool(int(s))
+
+
+_converters: dict[type, Callable[[str], Any]] = {
+    int: int,
+    float: float,
+    bool: _parseBool,
+}
+
+
+def _fieldsGetter(cls: type, fs) -> Callable[[Any], tuple[Any, ...]]:
+    names = tuple(field.name for field in fs)
+    # the slots of the lazy fields, which are read directly to not make
+    # the value, together with the factory to make an empty value
+    lazy = [
+        (i, getattr(cls, field.name), field.metadata["lazy"])
+        for i, field in enumerate(fs)
+        if "lazy" in field.metadata
+    ]
+    if lazy:
+        getValues = _fieldsGetter(cls, [f for f in fs if "lazy" not in f.metadata])
+
+        def getter(obj):
+            values = list(getValues(obj))
+            for i, slot, factory in lazy:
+                try:
+                    value = slot.__get__(obj)
+                except AttributeError:
+                    value = factory()
+                values.insert(i, value)
+            return tuple(values)
+
+    elif len(names) > 1:
+        return operator.attrgetter(*names)
+
+    else:
+        # attrgetter with a single name doesn't return a tuple
+        def getter(obj):
+            return tuple(getattr(obj, name) for name in names)
+
+    return getter
+
+
+def dataclassPlan(obj) -> DataclassPlan:
+    """
+    Get the field plan of the type of the given ``dataclass`` instance.
+    The plan is made on first use and then cached for the type.
+
+    A field of a slotted dataclass with a ``"lazy"`` factory in its
+    metadata is made on first access by the class. The plan leaves it
+    alone and gets a new empty value from the factory instead.
+    """
+    plan = _dataclassPlans.get(obj.__class__)
+    if plan is None:
+        if not is_dataclass(obj) or isinstance(obj, type):
+            raise TypeError(f"Object {obj} is not a dataclass")
+        fs = fields(obj)
+        names = tuple(field.name for field in fs)
+        plan = _dataclassPlans[obj.__class__] = DataclassPlan(
+            names,
+            tuple(field.default for field in fs),
+            _fieldsGetter(obj.__class__, fs),
+            tuple(
+                (field.name, field.default, _converters[type(field.default)])
+                for field in fs
+                if type(field.default) in _converters
+            ),
+            any("__slots__" in vars(c) for c in obj.__class__.__mro__),
+        )
+
+    return plan
+
+
 def dataclassAsDict(obj) -> dict:
     """
     Return dataclass values as ``dict``.
     This is a non-recursive variant of ``dataclasses.asdict``.
     """
-    if not is_dataclass(obj):
-        raise TypeError(f"Object {obj} is not a dataclass")
-
-    return {field.name: getattr(obj, field.name) for field in fields(obj)}
+    plan = dataclassPlan(obj)
+    return dict(zip(plan.names, plan.getter(obj)))
 
 
 def dataclassAsTuple(obj) -> tuple[Any, ...]:
@@ -95,10 +198,7 @@ def dataclassAsTuple(obj) -> tuple[Any, ...]:
     Return dataclass values as ``tuple``.
     This is a non-recursive variant of ``dataclasses.astuple``.
     """
-    if not is_dataclass(obj):
-        raise TypeError(f"Object {obj} is not a dataclass")
-
-    return tuple(getattr(obj, field.name) for field in fields(obj))
+    return dataclassPlan(obj).getter(obj)
 
 
 def dataclassNonDefaults(obj) -> dict[str, Any]:
@@ -106,19 +206,21 @@ def dataclassNonDefaults(obj) -> dict[str, Any]:
     For a ``dataclass`` instance get the fields that are different from the
     default values and return as ``dict``.
     """
-    if not is_dataclass(obj):
-        raise TypeError(f"Object {obj} is not a dataclass")
-
-    values = [getattr(obj, field.name) for field in fields(obj)]
+    plan = dataclassPlan(obj)
 
     return {
-        field.name: value
-        for field, value in zip(fields(obj), values)
+        name: value
+        for name, default, value in zip(plan.names, plan.defaults, plan.getter(obj))
         if value is not None
-        and value != field.default
+        and value != default
         and value == value
         and not (
-            (isinstance(value, list) and value == [])
+            # empty lists and list-like containers
+            (
+                isinstance(value, Sequence)
+                and not isinstance(value, (str, bytes, tuple))
+                and not value
+            )
             or (isinstance(value, dict) and value == {})
         )
     }
@@ -132,10 +234,17 @@ def dataclassUpdate(obj, *srcObjs, **kwargs) -> object:
     if not is_dataclass(obj):
         raise TypeError(f"Object {obj} is not a dataclass")
 
+    values: dict[str, Any] = {}
     for srcObj in srcObjs:
-        obj.__dict__.update(dataclassAsDict(srcObj))  # type: ignore
+        values.update(dataclassAsDict(srcObj))
+    values.update(kwargs)
 
-    obj.__dict__.update(**kwargs)  # type: ignore
+    if dataclassPlan(obj).slotted:
+        # fields may live in slots, also when a subclass has a __dict__
+        for name, value in values.items():
+            setattr(obj, name, value)
+    else:
+        vars(obj).update(values)
     return obj
 
 
@@ -489,10 +598,21 @@ async def waitUntilAsync(t: Time_t) -> bool:
 
 
 def patchAsyncio():
-    """Patch asyncio to allow nested event loops."""
+    """
+    Patch asyncio to allow nested event loops.
+
+    Event loops that can't be nested, such as the uvloop loop,
+    are left as they are.
+    """
     import nest_asyncio
 
-    nest_asyncio.apply()
+    loop = getLoop()
+    if not isinstance(loop, asyncio.BaseEventLoop):
+        logging.getLogger("ib_async.util").warning(
+            f"Can't patch loop of type {type(loop).__name__} for nesting"
+        )
+        return
+    nest_asyncio.apply(loop)
 
 
 @functools.cache
@@ -508,6 +628,30 @@ def getLoop():
     return loop
 
 
+def useUvloop() -> bool:
+    """
+    Use the uvloop event loop when it is installed, or keep using
+    the default asyncio event loop otherwise.
+
+    This must be called before anything else uses the event loop.
+    The uvloop loop can't be nested, so it can't be combined with
+    :func:`startLoop` or ``nest_asyncio``. The blocking methods of
+    :class:`.IB` still work, as long as they are not called from
+    within the running event loop.
+
+    Returns:
+        True if uvloop is used, False otherwise.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    getLoop.cache_clear()
+    return True
+
+
 def startLoop():
     """Use nested asyncio event loop for Jupyter notebooks."""
     patchAsyncio()
@@ -575,6 +719,131 @@ def formatIBDatetime(t: Union[dt.date, dt.datetime, str, None]) -> str:
     return s
 
 
+BarArrayFields = (
+    ("date", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("average", "f8"),
+    ("barCount", "i8"),
+)
+
+
+def barArray(fields: Sequence[str] = (), numBars: int = 0):
+    """
+    Create a NumPy structured array from the wire fields of historical bars,
+    with the bar dates as int64 epoch seconds.
+
+    Args:
+        fields: Flat sequence of ``numBars`` times the date, open, high, low,
+            close, volume, average and barCount fields. The dates are
+            either epoch seconds or 'yyyymmdd' (taken as UTC midnight).
+        numBars: Number of bars.
+    """
+    import numpy as np
+
+    n = len(BarArrayFields)
+    arr = np.empty(numBars, dtype=list(BarArrayFields))
+    if not numBars:
+        return arr
+    # parsing from an object array of str is much faster than from a
+    # fixed-width unicode array
+    cols = np.array(fields[: numBars * n], dtype=object).reshape(numBars, n)
+    for i, (name, dtype) in enumerate(BarArrayFields[1:], 1):
+        arr[name] = cols[:, i].astype(dtype)
+    dates = cols[:, 0].astype("i8")
+    if len(cols[0, 0]) == 8:
+        # daily and longer bars come as yyyymmdd
+        days = (
+            (dates // 10000 - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+            + (dates // 100 % 100 - 1)
+        ).astype("datetime64[D]") + (dates % 100 - 1)
+        dates = days.astype("datetime64[s]").astype("i8")
+    arr["date"] = dates
+    return arr
+
+
+TickArrayFields = {
+    # whatToShow: (fields per tick, ((wire position, name, dtype), ...))
+    "MIDPOINT": (4, ((0, "time", "i8"), (2, "price", "f8"), (3, "size", "f8"))),
+    "BID_ASK": (
+        6,
+        (
+            (0, "time", "i8"),
+            (1, "mask", "u1"),
+            (2, "priceBid", "f8"),
+            (3, "priceAsk", "f8"),
+            (4, "sizeBid", "f8"),
+            (5, "sizeAsk", "f8"),
+        ),
+    ),
+    "TRADES": (
+        6,
+        (
+            (0, "time", "i8"),
+            (1, "mask", "u1"),
+            (2, "price", "f8"),
+            (3, "size", "f8"),
+            (4, "exchange", "O"),
+            (5, "specialConditions", "O"),
+        ),
+    ),
+}
+
+
+def tickArray(whatToShow: str, fields: Sequence[str] = (), numTicks: int = 0):
+    """
+    Create a NumPy structured array from the wire fields of historical ticks,
+    with the tick times as int64 epoch seconds.
+
+    The ``mask`` column holds the tick attributes as bits instead of
+    :class:`.TickAttribBidAsk` (1 = askPastHigh, 2 = bidPastLow) or
+    :class:`.TickAttribLast` (1 = pastLimit, 2 = unreported) objects.
+    The exchange and special conditions strings are interned.
+
+    Args:
+        whatToShow: One of 'Bid_Ask', 'Midpoint' or 'Trades'.
+        fields: Flat sequence of the fields of ``numTicks`` ticks.
+        numTicks: Number of ticks.
+    """
+    import numpy as np
+
+    n, columns = TickArrayFields[whatToShow.upper()]
+    arr = np.empty(numTicks, dtype=[(name, dtype) for _, name, dtype in columns])
+    if not numTicks:
+        return arr
+    cols = np.array(fields[: numTicks * n], dtype=object).reshape(numTicks, n)
+    for i, name, dtype in columns:
+        if dtype == "O":
+            arr[name] = list(map(sys.intern, cols[:, i]))
+        else:
+            arr[name] = cols[:, i].astype(dtype)
+    return arr
+
+
+def epochToDatetime(times, tz: dt.tzinfo | None = None):
+    """
+    Vectorized conversion of int epoch seconds (such as the dates of
+    :func:`barArray` or the times of :func:`tickArray`) to datetimes.
+
+    Args:
+        times: Array of epoch seconds.
+        tz: If given then return a timezone-aware pandas ``DatetimeIndex``
+            in this timezone, otherwise a NumPy ``datetime64[s]`` array
+            in UTC.
+    """
+    import numpy as np
+
+    if tz is None:
+        return np.asarray(times, dtype="i8").astype("datetime64[s]")
+
+    import pandas as pd
+
+    return pd.to_datetime(times, unit="s", utc=True).tz_convert(tz)
+
+
 def parseIBDatetime(s: str) -> Union[dt.date, dt.datetime]:
     """Parse string in IB date or datetime format to datetime."""
     if len(s) == 8:
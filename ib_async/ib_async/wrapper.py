@@ -8,6 +8,7 @@ from collections import defaultdict
 from contextlib import suppress
 from dataclasses import dataclass, field
 from datetime import datetime
+from decimal import Decimal
 from typing import Any, cast, Final, Optional, TYPE_CHECKING, TypeAlias, Union
 
 from ib_async.contract import (
@@ -24,7 +25,6 @@ from ib_async.objects import (
     CommissionReport,
     DepthMktDataDescription,
     Dividends,
-    DOMLevel,
     Execution,
     FamilyCode,
     Fill,
@@ -60,8 +60,10 @@ from ib_async.objects import (
     TickData,
     TradeLogEntry,
 )
+from ib_async.governor import MemoryGovernor
 from ib_async.order import Order, OrderState, OrderStatus, Trade
 from ib_async.ticker import Ticker
+from ib_async.tickertable import TickerTable
 from ib_async.util import (
     dataclassAsDict,
     dataclassUpdate,
@@ -194,6 +196,24 @@ class Wrapper:
     fills: dict[str, Fill] = field(init=False)
     """ execId -> Fill """
 
+    openTrades: dict[int, Trade] = field(init=False)
+    """ id(trade) -> Trade, for the trades that are not done """
+
+    conId2Trades: dict[int, dict[int, Trade]] = field(init=False)
+    """ conId of the contract -> id(trade) -> Trade """
+
+    account2Trades: dict[str, dict[int, Trade]] = field(init=False)
+    """ account of the order -> id(trade) -> Trade """
+
+    orderRef2Trades: dict[str, dict[int, Trade]] = field(init=False)
+    """ orderRef of the order -> id(trade) -> Trade """
+
+    _tradeIndexKeys: dict[int, tuple[int, str, str]] = field(init=False)
+    """ id(trade) -> (conId, account, orderRef) it is indexed under """
+
+    conId2Fills: dict[int, dict[str, Fill]] = field(init=False)
+    """ conId of the contract -> execId -> Fill """
+
     newsTicks: list[NewsTick] = field(init=False)
 
     msgId2NewsBulletin: dict[int, NewsBulletin] = field(init=False)
@@ -204,6 +224,16 @@ class Wrapper:
 
     pendingTickers: set[Ticker] = field(init=False)
 
+    conflatedTickers: set[Ticker] = field(init=False)
+    """ updated tickers that are held back by the maximum update rates """
+
+    conflatedUpdates: int = field(init=False)
+    """ number of ticker updates that were merged into a later update """
+
+    conflatedPendingEvents: int = field(init=False)
+    """ number of network packets for which the pendingTickersEvent was
+    held back by the maximum rate """
+
     reqId2Ticker: dict[int, Ticker] = field(init=False)
     """ reqId -> Ticker """
 
@@ -213,6 +243,9 @@ class Wrapper:
     reqId2Subscriber: dict[int, Any] = field(init=False)
     """ live bars or live scan data """
 
+    columnarReqIds: set[int] = field(init=False)
+    """ reqIds of historical requests that decode into NumPy arrays """
+
     reqId2PnL: dict[int, PnL] = field(init=False)
     """ reqId -> PnL """
 
@@ -250,10 +283,19 @@ class Wrapper:
         default_factory=lambda: logging.getLogger("ib_async.wrapper")
     )
     _timeoutHandle: asyncio.TimerHandle | None = None
+    _conflateHandle: asyncio.TimerHandle | None = None
+    _tickerReleaseTimes: dict[Ticker, float] = field(init=False)
+    _lastReleaseTime: float = field(init=False)
 
     # value used when a field has missing, empty, or not populated data
     defaults: IBDefaults = field(default_factory=IBDefaults)
 
+    tickerTable: TickerTable | None = None
+    """ columns with the latest values of the updated tickers, if enabled """
+
+    governor: MemoryGovernor | None = None
+    """ evicts old records to keep the memory use bounded, if set """
+
     def __post_init__(self):
         # extract values from defaults objects just to use locally
         self.defaultTimezone = self.defaults.timezone
@@ -270,13 +312,26 @@ class Wrapper:
         self.trades = {}
         self.permId2Trade = {}
         self.fills = {}
+        self.openTrades = {}
+        self.conId2Trades = defaultdict(dict)
+        self.account2Trades = defaultdict(dict)
+        self.orderRef2Trades = defaultdict(dict)
+        self._tradeIndexKeys = {}
+        self.conId2Fills = defaultdict(dict)
+        if self.governor:
+            # the spilled records belong to the session that ends here
+            self.governor.clear()
         self.newsTicks = []
         self.msgId2NewsBulletin = {}
         self.tickers = {}
         self.pendingTickers = set()
+        self.conflatedTickers = set()
+        self.conflatedUpdates = 0
+        self.conflatedPendingEvents = 0
         self.reqId2Ticker = {}
         self.ticker2ReqId = defaultdict(dict)
         self.reqId2Subscriber = {}
+        self.columnarReqIds = set()
         self.reqId2PnL = {}
         self.reqId2PnlSingle = {}
         self.pnlKey2ReqId = {}
@@ -291,6 +346,11 @@ class Wrapper:
         self._timeout = 0
         self._futures = {}
         self._results = {}
+        if self._conflateHandle:
+            self._conflateHandle.cancel()
+        self._conflateHandle = None
+        self._tickerReleaseTimes = {}
+        self._lastReleaseTime = 0
         self.setTimeout(0)
 
     def setEventsDone(self):
@@ -389,6 +449,78 @@ class Wrapper:
             key = (clientId, orderId)
         return key
 
+    def addTrade(self, key: OrderKeyType, trade: Trade):
+        """Store the trade under its order key and index it."""
+        self.trades[key] = trade
+        self.indexTrade(trade)
+
+    def indexTrade(self, trade: Trade):
+        """
+        Add the trade to the indexes by status, conId, account and
+        orderRef, or move its entries after its status or order changed.
+        """
+        tradeId = id(trade)
+        if trade.orderStatus.status in OrderStatus.DoneStates:
+            self.openTrades.pop(tradeId, None)
+        else:
+            self.openTrades[tradeId] = trade
+
+        conId = trade.contract.conId
+        account = trade.order.account
+        orderRef = trade.order.orderRef
+        keys = (conId, account, orderRef)
+        oldKeys = self._tradeIndexKeys.get(tradeId)
+        if keys != oldKeys:
+            if oldKeys:
+                self._unindexTrade(tradeId, oldKeys)
+            self.conId2Trades[conId][tradeId] = trade
+            self.account2Trades[account][tradeId] = trade
+            self.orderRef2Trades[orderRef][tradeId] = trade
+            self._tradeIndexKeys[tradeId] = keys
+
+    def _unindexTrade(self, tradeId: int, keys: tuple[int, str, str]):
+        conId, account, orderRef = keys
+        _unindex(self.conId2Trades, conId, tradeId)
+        _unindex(self.account2Trades, account, tradeId)
+        _unindex(self.orderRef2Trades, orderRef, tradeId)
+
+    def removeTrade(self, key: OrderKeyType) -> Trade | None:
+        """
+        Remove the trade with the given order key and its index entries.
+        A late message for the order is ignored when the governor has
+        the trade in its spill file, see :meth:`isEvictedTrade`.
+        """
+        trade = self.trades.pop(key, None)
+        if trade:
+            tradeId = id(trade)
+            self.openTrades.pop(tradeId, None)
+            keys = self._tradeIndexKeys.pop(tradeId, None)
+            if keys:
+                self._unindexTrade(tradeId, keys)
+            permId = trade.order.permId or trade.orderStatus.permId
+            if permId and self.permId2Trade.get(permId) is trade:
+                del self.permId2Trade[permId]
+        return trade
+
+    def removeFill(self, execId: str) -> Fill | None:
+        """
+        Remove the fill with the given execId and its index entry.
+        A replay of the execution is ignored when the governor has the
+        fill in its spill file, see :meth:`isEvictedFill`.
+        """
+        fill = self.fills.pop(execId, None)
+        if fill:
+            _unindex(self.conId2Fills, fill.contract.conId, execId)
+        return fill
+
+    def isEvictedTrade(self, permId: int) -> bool:
+        """Has the trade with the given permId been evicted by the governor."""
+        return self.governor is not None and self.governor.isEvictedTrade(permId)
+
+    def isEvictedFill(self, execId: str) -> bool:
+        """Has the fill with the given execId been evicted by the governor."""
+        return self.governor is not None and self.governor.isEvictedFill(execId)
+
     def setTimeout(self, timeout: float):
         self.lastTime = datetime.now(self.defaultTimezone)
         if self._timeoutHandle:
@@ -589,35 +721,80 @@ class Wrapper:
             # response to whatIfOrder
             if float(orderState.initMarginChange) != UNSET_DOUBLE:
                 self._endReq(order.orderId, orderState)
-        else:
-            key = self.orderKey(order.clientId, order.orderId, order.permId)
-            trade = self.trades.get(key)
-            if trade:
-                trade.order.permId = order.permId
-                trade.order.totalQuantity = order.totalQuantity
-                trade.order.lmtPrice = order.lmtPrice
-                trade.order.auxPrice = order.auxPrice
-                trade.order.orderType = order.orderType
-                trade.order.orderRef = order.orderRef
-            else:
-                # ignore '?' values in the order
-                order = Order(
-                    **{k: v for k, v in dataclassAsDict(order).items() if v != "?"}
-                )
-                contract = Contract.recreate(contract)
-                orderStatus = OrderStatus(orderId=orderId, status=orderState.status)
-                trade = Trade(contract, order, orderStatus, [], [])
-                self.trades[key] = trade
-                self._logger.info(f"openOrder: {trade}")
+            self.ib.client.updateReqId(orderId + 1)
+            return
 
-            self.permId2Trade.setdefault(order.permId, trade)
-            results = self._results.get("openOrders")
+        key = self.orderKey(order.clientId, order.orderId, order.permId)
+        trade = self.trades.get(key)
+        if not trade and self.isEvictedTrade(order.permId):
+            # late message for an evicted trade
+            return
+        if trade:
+            self.openOrderUpdate(
+                orderId,
+                trade,
+                order.permId,
+                order.totalQuantity,
+                order.lmtPrice,
+                order.auxPrice,
+                order.orderType,
+                order.orderRef,
+            )
+            return
 
-            if results is None:
-                self.ib.openOrderEvent.emit(trade)
-            else:
-                # response to reqOpenOrders or reqAllOpenOrders
-                results.append(trade)
+        # ignore '?' values in the order
+        order = Order(**{k: v for k, v in dataclassAsDict(order).items() if v != "?"})
+        contract = Contract.recreate(contract)
+        orderStatus = OrderStatus(orderId=orderId, status=orderState.status)
+        trade = Trade(contract, order, orderStatus, [], [])
+        self.addTrade(key, trade)
+        self._logger.info(f"openOrder: {trade}")
+        self._openOrderTrade(orderId, trade)
+
+    def openOrderTrade(self, clientId: int, orderId: int, permId: int) -> Trade | None:
+        """
+        Get the known trade that an open order message is for, or None if
+        the order is new or a whatIf request.
+        """
+        if orderId in self._futures:
+            return None
+        return self.trades.get(self.orderKey(clientId, orderId, permId))
+
+    def openOrderUpdate(
+        self,
+        orderId: int,
+        trade: Trade,
+        permId: int,
+        totalQuantity: float,
+        lmtPrice: float | Decimal | None,
+        auxPrice: float | Decimal | None,
+        orderType: str,
+        orderRef: str,
+    ):
+        """
+        Update a known trade from an open order message. Only the order
+        fields that can change are given, the Decoder skips decoding the
+        rest of the message for known trades.
+        """
+        order = trade.order
+        order.permId = permId
+        order.totalQuantity = totalQuantity
+        order.lmtPrice = lmtPrice
+        order.auxPrice = auxPrice
+        order.orderType = orderType
+        order.orderRef = orderRef
+        self.indexTrade(trade)
+        self._openOrderTrade(orderId, trade)
+
+    def _openOrderTrade(self, orderId: int, trade: Trade):
+        self.permId2Trade.setdefault(trade.order.permId, trade)
+        results = self._results.get("openOrders")
+
+        if results is None:
+            self.ib.openOrderEvent.emit(trade)
+        else:
+            # response to reqOpenOrders or reqAllOpenOrders
+            results.append(trade)
 
         # make sure that the client issues order ids larger than any
         # order id encountered (even from other clients) to avoid
@@ -633,8 +810,10 @@ class Wrapper:
         trade = Trade(contract, order, orderStatus, [], [])
         self._results["completedOrders"].append(trade)
 
-        if order.permId not in self.permId2Trade:
-            self.trades[order.permId] = trade
+        if order.permId not in self.permId2Trade and not self.isEvictedTrade(
+            order.permId
+        ):
+            self.addTrade(order.permId, trade)
             self.permId2Trade[order.permId] = trade
 
     def completedOrdersEnd(self):
@@ -676,6 +855,8 @@ class Wrapper:
 
             if isChanged:
                 dataclassUpdate(trade.orderStatus, **new)
+                if status != oldStatus:
+                    self.indexTrade(trade)
                 msg = ""
             elif (
                 status == "Submitted"
@@ -698,7 +879,7 @@ class Wrapper:
                         trade.filledEvent.emit(trade)
                     elif status == OrderStatus.Cancelled:
                         trade.cancelledEvent.emit(trade)
-        else:
+        elif not self.isEvictedTrade(permId):
             self._logger.error(
                 "orderStatus: No order found for orderId %s and clientId %s",
                 orderId,
@@ -730,9 +911,10 @@ class Wrapper:
         isLive = reqId not in self._futures
         time = self.lastTime if isLive else execution.time
         fill = Fill(contract, execution, CommissionReport(), time)
-        if execId not in self.fills:
+        if execId not in self.fills and not self.isEvictedFill(execId):
             # first time we see this execution so add it
             self.fills[execId] = fill
+            self.conId2Fills[fill.contract.conId][execId] = fill
             if trade:
                 trade.fills.append(fill)
                 logEntry = TradeLogEntry(
@@ -771,6 +953,10 @@ class Wrapper:
                 # this is not a live execution and the order was filled
                 # before this connection started
                 pass
+        elif self.isEvictedFill(commissionReport.execId):
+            # update the spilled copy of the fill
+            assert self.governor
+            self.governor.updateCommissionReport(commissionReport)
         else:
             # commission report is not for this client
             pass
@@ -825,6 +1011,10 @@ class Wrapper:
             bar.date = parseIBDatetime(bar.date)  # type: ignore
             results.append(bar)
 
+    def historicalDataColumns(self, reqId: int, bars):
+        if reqId in self._results:
+            self._results[reqId] = bars
+
     def historicalDataEnd(self, reqId, _start: str, _end: str):
         self._endReq(reqId)
 
@@ -884,6 +1074,14 @@ class Wrapper:
         if done:
             self._endReq(reqId)
 
+    def historicalTicksColumns(self, reqId: int, ticks, done: bool):
+        result = self._results.get(reqId)
+        if result is not None:
+            result.append(ticks)
+
+        if done:
+            self._endReq(reqId)
+
     # additional wrapper method provided by Client
     def priceSizeTick(self, reqId: int, tickType: int, price: float, size: float):
         ticker = self.reqId2Ticker.get(reqId)
@@ -944,15 +1142,19 @@ class Wrapper:
             # self._logger.error(f"[{tickType=}] SET {ticker.prevLast=} = {ticker.last=}; {ticker.prevLastSize=} = {ticker.lastSize=}")
             # self._logger.error(f"[{tickType=}] updating last price size: {price=} {size=} :: AFTER {ticker=}")
         else:
-            assert tickType in PRICE_TICK_MAP, (
+            name = PRICE_TICK_MAP.get(tickType)
+            assert name, (
                 f"Received tick {tickType=} {price=} but we don't have an attribute mapping for it? Triggered from {ticker.contract=}"
             )
 
-            setattr(ticker, PRICE_TICK_MAP[tickType], price)
+            setattr(ticker, name, price)
 
         if price or size:
-            tick = TickData(self.lastTime, tickType, price, size)
-            ticker.ticks.append(tick)
+            if self.ib.TickRecords:
+                tick = TickData(self.lastTime, tickType, price, size)
+                ticker.ticks.append(tick)
+            if ticker.history is not None:
+                ticker.history.append(self.time, tickType, price, size)
 
         self.pendingTickers.add(ticker)
 
@@ -1001,15 +1203,19 @@ class Wrapper:
                 ticker.prevLastSize = ticker.lastSize
                 ticker.lastSize = size
         else:
-            assert tickType in SIZE_TICK_MAP, (
+            name = SIZE_TICK_MAP.get(tickType)
+            assert name, (
                 f"Received tick {tickType=} {size=} but we don't have an attribute mapping for it? Triggered from {ticker.contract=}"
             )
 
-            setattr(ticker, SIZE_TICK_MAP[tickType], size)
+            setattr(ticker, name, size)
 
         if price or size:
-            tick = TickData(self.lastTime, tickType, price, size)
-            ticker.ticks.append(tick)
+            if self.ib.TickRecords:
+                tick = TickData(self.lastTime, tickType, price, size)
+                ticker.ticks.append(tick)
+            if ticker.history is not None:
+                ticker.history.append(self.time, tickType, price, size)
 
         self.pendingTickers.add(ticker)
 
@@ -1167,8 +1373,11 @@ class Wrapper:
                 ticker.last = price
                 ticker.lastSize = size
 
-                tick = TickData(self.lastTime, tickType, price, size)
-                ticker.ticks.append(tick)
+                if self.ib.TickRecords:
+                    tick = TickData(self.lastTime, tickType, price, size)
+                    ticker.ticks.append(tick)
+                if ticker.history is not None:
+                    ticker.history.append(self.time, tickType, price, size)
             elif tickType == 59:
                 # Dividend tick:
                 # https://interactivebrokers.github.io/tws-api/tick_types.html#ib_dividends
@@ -1205,14 +1414,18 @@ class Wrapper:
             )
             return
 
-        assert tickType in GENERIC_TICK_MAP, (
+        name = GENERIC_TICK_MAP.get(tickType)
+        assert name, (
             f"Received tick {tickType=} {value=} but we don't have an attribute mapping for it? Triggered from {ticker.contract=}"
         )
 
-        setattr(ticker, GENERIC_TICK_MAP[tickType], value)
+        setattr(ticker, name, value)
 
-        tick = TickData(self.lastTime, tickType, value, 0)
-        ticker.ticks.append(tick)
+        if self.ib.TickRecords:
+            tick = TickData(self.lastTime, tickType, value, 0)
+            ticker.ticks.append(tick)
+        if ticker.history is not None:
+            ticker.history.append(self.time, tickType, value, 0)
         self.pendingTickers.add(ticker)
 
     def tickReqParams(
@@ -1260,44 +1473,16 @@ class Wrapper:
         # side: 0 = ask, 1 = bid
         ticker = self.reqId2Ticker[reqId]
 
-        # 'dom' is a dict so we can address position updates directly
-        dom = ticker.domBidsDict if side else ticker.domAsksDict
-
-        # if you're curious when these operations run and what they do, enable this too:
-        # fmt: off
-        # print("BID" if side else "ASK", "OPERATION", operation, "at position", position, "for price", price, "at qty", size)
-        # assert list(dom.keys()) == list(range(0, len(dom))), f"Keys aren't sequential? {dom} :: {ticker}"
-        # fmt: on
-
-        if operation in {0, 1}:
-            # '0' is INSERT NEW
-            # '1' is UPDATE EXISTING
-            # We are using the same operation for "insert or overwrite" directly.
-            dom[position] = DOMLevel(price, size, marketMaker)
+        book = ticker.domBids if side else ticker.domAsks
+        if operation == 0:
+            book.insert(position, price, size, marketMaker)
+        elif operation == 1:
+            book.update(position, price, size, marketMaker)
         elif operation == 2:
-            # '2' is DELETE EXISTING
             size = 0
-            try:
-                level = dom.pop(position)
-                price = level.price
-            except Exception as _:
-                # invalid position requested for removal, so ignore the request
-                pass
-
-        # To retain the original API structure, we convert all sorted dict
-        # values into lists for users to consume.
-        # Users can also read ticker.domBidsDict or ticker.domAsksDict directly.
-        values = list(dom.values())
-        if side:
-            # Update BID for users
-            ticker.domBids = values
-        else:
-            # Update ASK for users
-            ticker.domAsks = values
-
-        # TODO: add optional debugging check. In a correctly working system, we should
-        #       technically always have sequential bid and ask position entries, but
-        #       in the past we have seen gaps or missing values.
+            deleted = book.delete(position)
+            if deleted is not None:
+                price = deleted
 
         tick = MktDepthData(
             self.lastTime, position, marketMaker, operation, side, price, size
@@ -1552,6 +1737,7 @@ class Wrapper:
             # DO NOT delete the trade object because the order is STILL LIVE at the broker.
             if trade:
                 status = trade.orderStatus.status = OrderStatus.ValidationError
+                self.indexTrade(trade)
                 logEntry = TradeLogEntry(self.lastTime, status, msg, errorCode)
                 trade.log.append(logEntry)
                 self._logger.warning(f"IBKR API validation warning: {trade}")
@@ -1580,6 +1766,7 @@ class Wrapper:
                 #  - modification to *existing* order just has an update error, but the order is STILL LIVE
                 if not trade.isDone():
                     status = trade.orderStatus.status = OrderStatus.Cancelled
+                    self.indexTrade(trade)
                     logEntry = TradeLogEntry(self.lastTime, status, msg, errorCode)
                     trade.log.append(logEntry)
                     self._logger.warning(f"Canceled order: {trade}")
@@ -1608,8 +1795,6 @@ class Wrapper:
                 ]
                 ticker.domAsks.clear()
                 ticker.domBids.clear()
-                ticker.domBidsDict.clear()
-                ticker.domAsksDict.clear()
                 self.pendingTickers.add(ticker)
         elif errorCode == 10225:
             # Bust event occurred, current subscription is deactivated.
@@ -1645,19 +1830,142 @@ class Wrapper:
     def tcpDataArrived(self):
         self.lastTime = datetime.now(self.defaultTimezone)
         self.time = time.time()
-        for ticker in self.pendingTickers:
-            ticker.ticks = []
-            ticker.tickByTicks = []
-            ticker.domTicks = []
+        # the tick lists are reused to save allocations, they only hold
+        # the updates of the current packet; The emitted set of pending
+        # tickers may still be held by a consumer, so it's replaced
+        if self.pendingTickers:
+            for ticker in self.pendingTickers:
+                ticker.clearTicks()
 
-        self.pendingTickers = set()
+            self.pendingTickers = set()
 
     def tcpDataProcessed(self):
         self.ib.updateEvent.emit()
+        governor = self.governor
+        if governor is not None and self.time >= governor.nextRun:
+            try:
+                governor.run(self, self.time)
+            except Exception:
+                self._logger.exception("Memory governor failed")
+
         if self.pendingTickers:
+            if (
+                self.ib.MaxTickerRate
+                or self.ib.MaxPendingTickersRate
+                or self.conflatedTickers
+            ):
+                self._conflateTickers()
+                return
+
+            table = self.tickerTable
             for ticker in self.pendingTickers:
                 ticker.time = self.lastTime
                 ticker.timestamp = self.time
+                if table is not None:
+                    table.update(ticker)
                 ticker.updateEvent.emit(ticker)
 
             self.ib.pendingTickersEvent.emit(self.pendingTickers)
+
+    def _conflateTickers(self):
+        table = self.tickerTable
+        for ticker in self.pendingTickers:
+            ticker.time = self.lastTime
+            ticker.timestamp = self.time
+            if table is not None:
+                table.update(ticker)
+
+        self._releaseTickers(self.time)
+
+    def _releaseTickers(self, now: float):
+        """
+        Emit the pending tickers that are within the maximum update rates
+        and hold back the others in ``conflatedTickers``. A held back
+        ticker keeps its ticks until it is released.
+        """
+        pending = self.pendingTickers
+        held = self.conflatedTickers
+        rate = self.ib.MaxPendingTickersRate
+        if rate:
+            wait = self._lastReleaseTime + 1 / rate - now
+            if wait > 0:
+                n = len(held)
+                held |= pending
+                self.conflatedUpdates += n + len(pending) - len(held)
+                self.conflatedPendingEvents += 1
+                pending.clear()
+                self._scheduleRelease(wait)
+                return
+
+        rate = self.ib.MaxTickerRate
+        if rate:
+            interval = 1 / rate
+            times = self._tickerReleaseTimes
+            hold = [t for t in pending if now - times.get(t, 0) < interval]
+            for ticker in hold:
+                pending.discard(ticker)
+                if ticker in held:
+                    self.conflatedUpdates += 1
+                else:
+                    held.add(ticker)
+                    self._scheduleRelease(times[ticker] + interval - now)
+            for ticker in pending:
+                if ticker in held:
+                    held.discard(ticker)
+                    self.conflatedUpdates += 1
+                times[ticker] = now
+        elif held:
+            n = len(pending)
+            pending |= held
+            self.conflatedUpdates += n + len(held) - len(pending)
+            held.clear()
+
+        if pending:
+            self._lastReleaseTime = now
+            for ticker in pending:
+                ticker.updateEvent.emit(ticker)
+
+            self.ib.pendingTickersEvent.emit(pending)
+
+    def _scheduleRelease(self, delay: float):
+        loop = getLoop()
+        when = loop.time() + delay
+        handle = self._conflateHandle
+        if handle is None or when < handle.when():
+            if handle:
+                handle.cancel()
+            self._conflateHandle = loop.call_at(when, self._releaseConflated)
+
+    def _releaseConflated(self):
+        self._conflateHandle = None
+        now = time.time()
+        # the tickers of the previous emit are done with, as on a new packet
+        for ticker in self.pendingTickers:
+            ticker.clearTicks()
+
+        self.pendingTickers = set()
+        held = self.conflatedTickers
+        rate = self.ib.MaxTickerRate
+        if rate:
+            interval = 1 / rate
+            times = self._tickerReleaseTimes
+            due = [t for t in held if now - times.get(t, 0) >= interval]
+        else:
+            due = list(held)
+        for ticker in due:
+            held.discard(ticker)
+        self.pendingTickers.update(due)
+        self._releaseTickers(now)
+
+        if rate and held and self._conflateHandle is None:
+            # the rest is held back by the maximum rate per ticker
+            self._scheduleRelease(min(times[t] for t in held) + interval - now)
+
+
+def _unindex(index: dict[Any, dict], value, key):
+    # remove the entry from the index, with its bucket when it's empty
+    bucket = index.get(value)
+    if bucket is not None:
+        bucket.pop(key, None)
+        if not bucket:
+            del index[value]
@@ -0,0 +1,61 @@
+import gc
+import weakref
+
+import ib_async
+from ib_async import LimitOrder, OrderState, Stock
+
+
+def openOrder(wrapper, orderId, orderRef):
+    order = LimitOrder(
+        "BUY",
+        100,
+        10.0,
+        orderId=orderId,
+        clientId=1,
+        permId=1000 + orderId,
+        account="DU1",
+        orderRef=orderRef,
+    )
+    contract = Stock("AAPL", "SMART", "USD", conId=265598)
+    wrapper.openOrder(orderId, contract, order, OrderState(status="Submitted"))
+
+
+def test_modified_trade_moves_its_index_entries():
+    wrapper = ib_async.IB().wrapper
+    openOrder(wrapper, 1, "first")
+    trade = wrapper.trades[1, 1]
+
+    # a modification that changes the orderRef
+    openOrder(wrapper, 1, "second")
+    assert wrapper.trades[1, 1] is trade
+    assert "first" not in wrapper.orderRef2Trades
+    assert list(wrapper.orderRef2Trades["second"].values()) == [trade]
+
+    wrapper.removeTrade((1, 1))
+    assert not wrapper.conId2Trades
+    assert not wrapper.account2Trades
+    assert not wrapper.orderRef2Trades
+    assert not wrapper.openTrades
+
+
+def test_evicted_trade_is_released(tmp_path):
+    wrapper = ib_async.IB().wrapper
+    governor = ib_async.MemoryGovernor(str(tmp_path / "spill.db"), maxTrades=1)
+    wrapper.governor = governor
+    for orderId in (1, 2):
+        openOrder(wrapper, orderId, "ref")
+        wrapper.orderStatus(
+            orderId, "Filled", 100, 0, 10.0, 1000 + orderId, 0, 10.0, 1, ""
+        )
+    ref = weakref.ref(wrapper.trades[1, 1])
+
+    governor.run(wrapper)
+    gc.collect()
+    assert ref() is None
+    assert (1, 1) not in wrapper.trades
+    assert governor.isEvictedTrade(1001)
+
+    # a late message for the evicted trade doesn't bring it back
+    openOrder(wrapper, 1, "ref")
+    assert (1, 1) not in wrapper.trades
+    governor.close()